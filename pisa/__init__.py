@@ -60,6 +60,7 @@ __all__ = [
     'NUMBA_AVAIL',
     'NUMBA_CUDA_AVAIL',
     'TARGET',
+    'GPU_ID',
     'OMP_NUM_THREADS',
     'FTYPE',
     'HASH_SIGFIGS',
@@ -223,6 +224,24 @@ if TARGET is not None and 'PISA_TARGET' in os.environ:
 
 del cpu_targets, gpu_targets, parallel_targets
 
+# Select the GPU to run on; otherwise numba creates its context on device 0
+GPU_ID = None
+"""Index of the GPU used if TARGET is 'cuda' (None: numba's default device)"""
+
+if TARGET == 'cuda' and 'PISA_GPU_ID' in os.environ:
+    PISA_GPU_ID = os.environ['PISA_GPU_ID']
+    ini_msgs.append('PISA_GPU_ID env var is defined as: "%s"' % PISA_GPU_ID)
+    try:
+        GPU_ID = int(PISA_GPU_ID)
+    except ValueError:
+        raise ValueError(
+            'Environment var PISA_GPU_ID="%s" is not an integer device index'
+            %PISA_GPU_ID
+        )
+    from numba import cuda
+    cuda.select_device(GPU_ID)
+    del cuda
+
 
 # Define HASH_SIGFIGS to set hashing precision based on FTYPE above; value here
 # is default (i.e. for FTYPE == np.float64)
@@ -279,6 +298,8 @@ elif TARGET == 'parallel':
     target_msg = 'numba is running on CPU (multicore)' # pylint: disable=invalid-name
 elif TARGET == 'cuda':
     target_msg = 'numba is running on GPU' # pylint: disable=invalid-name
+    if GPU_ID is not None:
+        target_msg += ' %d' % GPU_ID
 ini_msgs.append(target_msg)
 del target_msg
 
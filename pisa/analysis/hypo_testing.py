@@ -1474,7 +1474,7 @@ class HypoTesting(Analysis):
         run_info.append('pprint = %s' %self.pprint)
         for env_var in ['PISA_FTYPE', 'PISA_RESOURCES',
                         'MKL_NUM_THREADS', 'OMP_NUM_THREADS',
-                        'CUDA_VISIBLE_DEVICES',
+                        'CUDA_VISIBLE_DEVICES', 'PISA_GPU_ID',
                         'PATH', 'LD_LIBRARY_PATH', 'PYTHONPATH']:
             if env_var in os.environ:
                 val = os.environ[env_var]
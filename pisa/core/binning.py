@@ -2086,7 +2086,7 @@ class MultiDimBinning(object):
             useful when using e.g. `enumerate(iterbins)`
 
         """
-        return (self.index2coord(i) for i in range(self.size))
+        return (self.coord(*idx) for idx in np.ndindex(*self.shape)) # pylint: disable=not-callable
 
     def index2coord(self, index):
         """Convert a flat index into an N-dimensional bin coordinate.
@@ -10,6 +10,7 @@ from __future__ import absolute_import, division, print_function
 
 from copy import deepcopy
 from collections import Iterable, Mapping, OrderedDict, Sequence
+import os
 
 import h5py
 import numpy as np
@@ -49,6 +50,10 @@ __license__ = '''Copyright (c) 2014-2017, The IceCube Collaboration
  limitations under the License.'''
 
 
+_METADATA_CACHE = dict()
+"""Metadata read by `Events.read_metadata`, keyed by (path, mtime)"""
+
+
 # TODO: test hash function (attr)
 class Events(FlavIntData):
     """Container for storing events, including metadata about the events.
@@ -161,14 +166,47 @@ class Events(FlavIntData):
     def __load(self, fname):
         fpath = resources.find_resource(fname)
         with h5py.File(fpath, 'r') as open_file:
-            meta = dict(open_file.attrs)
-            for k, v in meta.items():
-                if hasattr(v, 'tolist'):
-                    meta[k] = v.tolist()
+            meta = self._attrs_to_metadata(open_file.attrs)
             data = hdf.from_hdf(open_file)
         self.validate(data)
         return data, meta
 
+    @staticmethod
+    def _attrs_to_metadata(attrs):
+        meta = dict(attrs)
+        for k, v in meta.items():
+            if hasattr(v, 'tolist'):
+                meta[k] = v.tolist()
+        return meta
+
+    @staticmethod
+    def read_metadata(fname):
+        """Read only the metadata stored in a PISA events HDF5 file, without
+        loading (or validating) the events themselves.
+
+        Results are cached for as long as the file is not modified.
+
+        Parameters
+        ----------
+        fname : string
+            Resource location of the events file
+
+        Returns
+        -------
+        metadata : dict
+            Metadata as stored in the file, i.e. without the defaults an
+            `Events` object fills in for missing keys
+
+        """
+        fpath = resources.find_resource(fname)
+        key = (fpath, os.path.getmtime(fpath))
+        if key not in _METADATA_CACHE:
+            with h5py.File(fpath, 'r') as open_file:
+                _METADATA_CACHE[key] = Events._attrs_to_metadata(
+                    open_file.attrs
+                )
+        return deepcopy(_METADATA_CACHE[key])
+
     def save(self, fname, **kwargs):
         hdf.to_hdf(self, fname, attrs=self.metadata, **kwargs)
 
@@ -1093,6 +1131,11 @@ def test_Events():
     # Instantiate from PISA events HDF5 file
     events = Events('events/events__vlvnt__toy_1_to_80GeV_spidx1.0_cz-1_to_1_1e2evts_set0__unjoined__with_fluxes_honda-2015-spl-solmin-aa.hdf5')
 
+    # Read only the metadata from the same file
+    meta = Events.read_metadata('events/events__vlvnt__toy_1_to_80GeV_spidx1.0_cz-1_to_1_1e2evts_set0__unjoined__with_fluxes_honda-2015-spl-solmin-aa.hdf5')
+    for key, val in meta.items():
+        assert recursiveEquality(events.metadata[key], val), key
+
     # Apply a simple cut
     events = events.applyCut('(true_coszen <= 0.5) & (true_energy <= 70)')
     for fi in events.flavints:
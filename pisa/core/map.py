@@ -9,22 +9,39 @@ containers but that get passed down to operate on the contained data.
 
 from __future__ import absolute_import, division
 
-from collections import OrderedDict, Iterable, Mapping, Sequence
+import ast
+from collections import OrderedDict
+try:
+    from collections.abc import Iterable, Mapping, Sequence
+except ImportError:
+    from collections import Iterable, Mapping, Sequence
 from copy import deepcopy, copy
 from fnmatch import fnmatch
+import hashlib
 from itertools import izip, permutations
-from operator import add, getitem, setitem
+import math
+from operator import add, attrgetter, getitem
 import os
 import re
 import shutil
+import struct
 import tempfile
 
 from decorator import decorate
 import numpy as np
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 from scipy.stats import poisson, norm
 import uncertainties
 from uncertainties import ufloat
 from uncertainties import unumpy as unp
+from uncertainties.core import AffineScalarFunc
 
 from pisa import ureg, HASH_SIGFIGS
 from pisa.core.binning import OneDimBinning, MultiDimBinning
@@ -77,6 +94,90 @@ def type_error(value):
                     % value.__class__.__name__)
 
 
+def _sum_maps(maps):
+    """Sum a sequence of Maps. Equivalent to `reduce(add, maps)` (i.e., the
+    result takes its name and other metadata from the first map), but if all
+    maps share the same binning, the sum is computed in a single reduction over
+    the stacked values (and errors) rather than via intermediate Maps.
+
+    """
+    # pylint: disable=protected-access
+    first = maps[0]
+    binning = first.binning
+    if len(maps) < 2 or any(m.binning is not binning and m.binning != binning
+                            for m in maps[1:]):
+        return reduce(add, maps)
+    hist = np.sum([m._nom for m in maps], axis=0)
+    std_devs = [m._std for m in maps if m._std is not None]
+    error_hist = None
+    if std_devs:
+        error_hist = np.sqrt(np.sum(np.square(std_devs), axis=0))
+    return Map._from_arrays(
+        name=first._name, hist=hist, error_hist=error_hist, binning=binning,
+        hash=first._hash, tex=first._tex,
+        full_comparison=any(m.full_comparison for m in maps)
+    )
+
+
+_EXPR_BINARY_OPS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+    ast.Div: np.true_divide, ast.Pow: np.power, ast.Mod: np.mod,
+    ast.BitAnd: np.bitwise_and, ast.BitOr: np.bitwise_or,
+}
+_EXPR_UNARY_OPS = {
+    ast.USub: np.negative, ast.UAdd: lambda x: x, ast.Invert: np.invert,
+}
+_EXPR_COMPARE_OPS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+_EXPR_FUNCTIONS = {
+    name: getattr(np, name) for name in [
+        'where', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2',
+        'sinh', 'cosh', 'tanh', 'arcsinh', 'arccosh', 'arctanh', 'log',
+        'log10', 'log1p', 'exp', 'expm1', 'sqrt', 'abs'
+    ]
+}
+
+
+def _evaluate_expr(node, local_dict):
+    """Evaluate the parsed elementwise expression `node` with numpy, looking
+    up names in `local_dict`. Only the arithmetic, comparison, and function
+    syntax also accepted by numexpr is supported."""
+    if isinstance(node, ast.Expression):
+        return _evaluate_expr(node.body, local_dict)
+    if isinstance(node, ast.Num):
+        return node.n
+    if isinstance(node, ast.Name):
+        if node.id not in local_dict:
+            raise NameError('Name "%s" in expression is not defined'
+                            % node.id)
+        return local_dict[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in _EXPR_BINARY_OPS:
+        return _EXPR_BINARY_OPS[type(node.op)](
+            _evaluate_expr(node.left, local_dict),
+            _evaluate_expr(node.right, local_dict)
+        )
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _EXPR_UNARY_OPS:
+        return _EXPR_UNARY_OPS[type(node.op)](
+            _evaluate_expr(node.operand, local_dict)
+        )
+    if (isinstance(node, ast.Compare) and len(node.ops) == 1
+            and type(node.ops[0]) in _EXPR_COMPARE_OPS):
+        return _EXPR_COMPARE_OPS[type(node.ops[0])](
+            _evaluate_expr(node.left, local_dict),
+            _evaluate_expr(node.comparators[0], local_dict)
+        )
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _EXPR_FUNCTIONS and not node.keywords
+            and getattr(node, 'starargs', None) is None
+            and getattr(node, 'kwargs', None) is None):
+        return _EXPR_FUNCTIONS[node.func.id](
+            *[_evaluate_expr(arg, local_dict) for arg in node.args]
+        )
+    raise ValueError('Unsupported syntax in expression: %s' % ast.dump(node))
+
+
 def reduceToHist(obj):
     """Recursively sum to reduce an object to a single histogram.
 
@@ -99,7 +200,7 @@ def reduceToHist(obj):
     elif isinstance(obj, Map):
         hist = obj.hist
     elif isinstance(obj, MapSet):
-        hist = sum(obj).hist
+        hist = _sum_maps(obj.maps).hist
     elif isinstance(obj, Iterable):
         hist = sum([reduceToHist(x) for x in obj])
     else:
@@ -179,8 +280,62 @@ def rebin(hist, orig_binning, new_binning, normalize_values=True):
     return new_hist
 
 
+_map_metadata_epoch = 0 # pylint: disable=invalid-name
+"""Incremented whenever the name or hash of any Map changes, so that MapSets
+can cache the names and hashes of their maps"""
+
+
+def _bump_map_metadata_epoch():
+    """Invalidate the names and hashes cached by MapSets"""
+    global _map_metadata_epoch # pylint: disable=global-statement, invalid-name
+    _map_metadata_epoch += 1
+
+
+class _MapList(list):
+    """List of the maps of a MapSet, counting its modifications in `version`
+    so the MapSet can cache values derived from its maps"""
+    def __init__(self, *args):
+        super(_MapList, self).__init__(*args)
+        self.version = 0
+
+
+def _counts_modification(method):
+    """Wrap the list `method` to increment the list's version when called"""
+    def modifying_method(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+    modifying_method.__name__ = method.__name__
+    modifying_method.__doc__ = method.__doc__
+    return modifying_method
+
+
+for _method_name in ['append', 'extend', 'insert', 'pop', 'remove', 'reverse',
+                     'sort', '__setitem__', '__delitem__', '__setslice__',
+                     '__delslice__', '__iadd__', '__imul__']:
+    if hasattr(list, _method_name):
+        setattr(_MapList, _method_name,
+                _counts_modification(getattr(list, _method_name)))
+del _method_name
+
+
+_IMMUTABLE_ATTRS = ('name', 'hash', 'tex', 'full_comparison')
+"""Map attributes (stored with a leading underscore) that are immutable and so
+can be passed on by reference to Maps derived from another"""
+
+_get_name = attrgetter('name')
+_get_hash = attrgetter('hash')
+
+_PER_SET_ARG_TYPES = frozenset([
+    bool, int, long, float, complex, str, unicode, np.ndarray,
+    np.bool_, np.int32, np.int64, np.float32, np.float64,
+    uncertainties.core.Variable
+])
+"""Exact types of arguments that `MapSet` passes on as-is to every contained
+map (checked before the more general, slower tests in `MapSet._args_per_map`)"""
+
+
 def _new_obj(original_function):
-    """Decorator to deepcopy unaltered states into new Map object."""
+    """Decorator to copy unaltered states into new Map object."""
     def new_function(*args, **kwargs):
         """Augmented function to replace `original_function`. Note that this
         docstring and the function signature will be overwritten by those from
@@ -189,19 +344,146 @@ def _new_obj(original_function):
         func = args[0]
         self = args[1]
         args = args[2:]
-        new_state = OrderedDict()
         state_updates = func(self, *args, **kwargs)
-        for slot in self._state_attrs:
-            if state_updates is not None and state_updates.has_key(slot):
-                new_state[slot] = state_updates[slot]
-            else:
-                new_state[slot] = deepcopy(getattr(self, slot))
-        if len(new_state['binning']) == 0:
-            return np.asscalar(new_state['hist'])
+        new_state = {} if state_updates is None else dict(state_updates)
+        for attr in _IMMUTABLE_ATTRS:
+            if attr not in new_state:
+                # Unset tex is passed on as None, to be derived from the name
+                # only if and when the new map's tex is accessed
+                new_state[attr] = getattr(self, '_' + attr)
+        if 'binning' not in new_state:
+            # Binning objects are not modified by Map, so can be shared
+            new_state['binning'] = self._binning
+        if 'hist' not in new_state:
+            new_state['hist'] = self._nom.copy()
+            if 'error_hist' not in new_state:
+                new_state['error_hist'] = (
+                    None if self._std is None else self._std.copy()
+                )
+        elif 'error_hist' not in new_state:
+            # Errors only carry over if the values they belong to do
+            new_state['error_hist'] = None
+        binning = new_state['binning']
+        hist = new_state['hist']
+        if len(binning) == 0:
+            if new_state['error_hist'] is None:
+                return np.asscalar(hist)
+            return ufloat(np.asscalar(hist),
+                          np.asscalar(new_state['error_hist']))
+        if (isinstance(binning, MultiDimBinning)
+                and isinstance(hist, np.ndarray) and hist.dtype != np.object_):
+            return Map._from_arrays(**new_state)
         return Map(**new_state)
     return decorate(original_function, new_function)
 
 
+def _split_uncertainties(values):
+    """Split `values` into nominal values and standard deviations.
+
+    Parameters
+    ----------
+    values : scalar, numpy.ndarray, uncertainties number or unumpy array
+
+    Returns
+    -------
+    nominal_values, std_devs
+        `std_devs` is None if `values` carries no uncertainties
+
+    """
+    if isinstance(values, AffineScalarFunc):
+        return values.nominal_value, values.std_dev
+    if isinstance(values, np.ndarray) and values.dtype == np.object_:
+        return unp.nominal_values(values), unp.std_devs(values)
+    return values, None
+
+
+def _error_term(derivative, std_devs):
+    """Contribution `derivative * std_devs` of one (uncorrelated) operand to
+    the linearly-propagated error of a result. Entries without uncertainty
+    contribute nothing, even where the derivative diverges."""
+    with np.errstate(invalid='ignore'):
+        term = np.abs(derivative * std_devs)
+    return np.where(std_devs == 0, 0, term)
+
+
+def _readonly_view(array):
+    """Read-only view of `array`, such that the arrays handed out by a Map can
+    not be modified behind its back (bypassing the invalidation of its cached
+    state in `Map.__setitem__`)"""
+    view = array.view()
+    view.setflags(write=False)
+    return view
+
+
+def _storage_array(values, dtype=None):
+    """C-contiguous array of `values` for storage in a Map, copied if it is
+    read-only (e.g. a view returned by another Map's `hist`) so that the new
+    Map can be modified via item assignment"""
+    array = np.ascontiguousarray(values, dtype=dtype)
+    if not array.flags.writeable:
+        array = array.copy()
+    return array
+
+
+def _error_dtype(nominal_values):
+    """Floating-point dtype for the errors on `nominal_values`: the dtype of the
+    values themselves if floating point, otherwise float64"""
+    dtype = np.asarray(nominal_values).dtype
+    if np.issubdtype(dtype, np.floating):
+        return dtype
+    return np.dtype(np.float64)
+
+
+def _quadrature_sum(nominal_values, *terms):
+    """Add error `terms` in quadrature, broadcasting to the shape of
+    `nominal_values`. None terms are skipped; if all are None, None is
+    returned (i.e., the result carries no uncertainties)."""
+    terms = [t for t in terms if t is not None]
+    if not terms:
+        return None
+    std_devs = np.zeros(np.shape(nominal_values),
+                        dtype=_error_dtype(nominal_values))
+    for term in terms:
+        std_devs = np.hypot(std_devs, term)
+    return std_devs
+
+
+# Linear propagation of uncorrelated errors for binary operations `c = a op b`
+# where `sa`, `sb` are the standard deviations of `a`, `b` (or None)
+
+def _err_add(a, sa, b, sb, c): # pylint: disable=unused-argument
+    """Errors of `c = a + b` (also valid for `c = a - b`)"""
+    return _quadrature_sum(c, sa, sb)
+
+
+def _err_mul(a, sa, b, sb, c):
+    """Errors of `c = a * b`"""
+    return _quadrature_sum(
+        c,
+        None if sa is None else _error_term(b, sa),
+        None if sb is None else _error_term(a, sb)
+    )
+
+
+def _err_div(a, sa, b, sb, c):
+    """Errors of `c = a / b`"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _quadrature_sum(
+            c,
+            None if sa is None else _error_term(1 / b, sa),
+            None if sb is None else _error_term(c / b, sb)
+        )
+
+
+def _err_pow(a, sa, b, sb, c):
+    """Errors of `c = a**b`"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _quadrature_sum(
+            c,
+            None if sa is None else _error_term(b * np.power(a, b - 1.0), sa),
+            None if sb is None else _error_term(c * np.log(a), sb)
+        )
+
 
 def valid_nominal_values(data_array):
     """Get the the nominal values that are valid for an array"""
@@ -247,6 +529,12 @@ class Map(object):
         Whether to perform full (recursive) comparisons when testing the
         equality of this map with another. See `__eq__` method.
 
+    dtype : None or numpy dtype
+        If specified, `hist` is cast to this dtype, e.g. `np.float32` to halve
+        the memory footprint of maps for which single precision suffices.
+        Errors are stored with the same dtype if it is floating point (float64
+        otherwise), and arithmetic between maps of the same dtype preserves it.
+
 
     Examples
     --------
@@ -264,7 +552,7 @@ class Map(object):
     >>> m0.binning
     energy: 4 logarithmically-uniform bins spanning [1.0, 80.0] GeV
     coszen: 5 equally-sized bins spanning [-1.0, 0.0]
-    >>> m0.hist[0:4, 0] = 1
+    >>> m0[0:4, 0] = 1
     >>> m0
     array([[ 1.,  0.,  0.,  0.,  0.],
            [ 1.,  0.,  0.,  0.,  0.],
@@ -291,19 +579,32 @@ class Map(object):
     (17.85 GeV, -0.70 ): 0.0
 
     """
-    _slots = ('name', 'hist', 'binning', 'hash', '_hash', 'tex',
-              'full_comparison', 'parent_indexer', '_normalize_values')
-    _state_attrs = ('name', 'hist', 'binning', 'hash', 'tex',
+    # Public attributes are accessed via properties; only the following can be
+    # set on an instance
+    __slots__ = ('_name', '_tex', '_hash', '_full_comparison', '_binning',
+                 '_nom', '_std', '_normalize_values', 'parent_indexer',
+                 '_parent', '_version', '_hashable_state_version',
+                 '_cached_hashable_state', '_content_hash_version',
+                 '_cached_content_hash')
+    _state_attrs = ('name', 'hist', 'error_hist', 'binning', 'hash', 'tex',
                     'full_comparison')
 
     def __init__(self, name, hist, binning, error_hist=None, hash=None,
-                 tex=None, full_comparison=False):
+                 tex=None, full_comparison=False, dtype=None):
         # Set Read/write attributes via their defined setters
         super(Map, self).__setattr__('_name', name)
         super(Map, self).__setattr__('_tex', tex)
         super(Map, self).__setattr__('_hash', hash)
         super(Map, self).__setattr__('_full_comparison', full_comparison)
 
+        # Incremented by every method/setter that modifies the map's state, so
+        # that derived quantities (e.g. `hashable_state`) can be cached
+        super(Map, self).__setattr__('_version', 0)
+        super(Map, self).__setattr__('_hashable_state_version', None)
+        super(Map, self).__setattr__('_cached_hashable_state', None)
+        super(Map, self).__setattr__('_content_hash_version', None)
+        super(Map, self).__setattr__('_cached_content_hash', None)
+
         if not isinstance(binning, MultiDimBinning):
             if isinstance(binning, Sequence):
                 binning = MultiDimBinning(dimensions=binning)
@@ -313,17 +614,57 @@ class Map(object):
                 raise ValueError('Do not know what to do with `binning`=%s of'
                                  ' type %s' %(binning, type(binning)))
         self.parent_indexer = None
+        super(Map, self).__setattr__('_parent', None)
 
         # Do the work here to set read-only attributes
         super(Map, self).__setattr__('_binning', binning)
         binning.assert_array_fits(hist)
+
+        # Values and their uncertainties are stored as separate arrays
+        # (rather than as an object array of `uncertainties` numbers) so that
+        # all operations remain vectorized numpy operations
+        nominal_values, std_devs = _split_uncertainties(hist)
         super(Map, self).__setattr__(
-            '_hist', np.ascontiguousarray(hist)
+            '_nom', _storage_array(nominal_values, dtype=dtype)
         )
+        super(Map, self).__setattr__('_std', None)
         if error_hist is not None:
             self.set_errors(error_hist)
+        elif std_devs is not None:
+            self.set_errors(std_devs)
         self._normalize_values = True
 
+    @classmethod
+    def _from_arrays(cls, name, hist, error_hist, binning, hash, tex,
+                     full_comparison):
+        """Instantiate a Map while bypassing the argument checking and
+        conversions performed by `__init__`. For internal use only, where it is
+        known that `binning` is a MultiDimBinning, `hist` a bare numpy array
+        of shape `binning.shape`, and `error_hist` None or the same.
+
+        """
+        # pylint: disable=redefined-builtin
+        new_map = cls.__new__(cls)
+        setattr_ = super(Map, new_map).__setattr__
+        setattr_('_name', name)
+        setattr_('_tex', tex)
+        setattr_('_hash', hash)
+        setattr_('_full_comparison', full_comparison)
+        setattr_('_version', 0)
+        setattr_('_hashable_state_version', None)
+        setattr_('_cached_hashable_state', None)
+        setattr_('_content_hash_version', None)
+        setattr_('_cached_content_hash', None)
+        setattr_('parent_indexer', None)
+        setattr_('_parent', None)
+        setattr_('_binning', binning)
+        setattr_('_nom', _storage_array(hist))
+        if error_hist is not None:
+            error_hist = _storage_array(error_hist, dtype=_error_dtype(hist))
+        setattr_('_std', error_hist)
+        setattr_('_normalize_values', True)
+        return new_map
+
     def __repr__(self):
         previous_precision = np.get_printoptions()['precision']
         np.set_printoptions(precision=18)
@@ -398,8 +739,8 @@ class Map(object):
         its parent, including the ordering of the dimensions. The size of each
         dimension, however, is reduced by slicing.
 
-        Note also that modifications to the returned object's `hist` will
-        modify the parent's `hist`.
+        Note also that modifications to the returned object (via item
+        assignment) will modify the parent.
 
 
         Examples
@@ -434,7 +775,7 @@ class Map(object):
         ... ])
         >>> ones = mdb.ones(name='ones')
         >>> sl = ones.slice(x=2)
-        >>> sl.hist[...] = 0
+        >>> sl[...] = 0
         >>> print sl.hist
         >>> print ones.hist
         [[ 1.  1.  1.  1.  1.  1.  1.  1.  1.  1.]
@@ -459,13 +800,19 @@ class Map(object):
         """
         return self[self.binning.indexer(**kwargs)]
 
+    def _state_changed(self):
+        """Invalidate cached quantities derived from the map's state, and from
+        that of the map this one is a slice of (if any), as the two share their
+        values"""
+        mp = self
+        while mp is not None:
+            super(Map, mp).__setattr__('_version', mp._version + 1)
+            mp = mp._parent
+
     def set_poisson_errors(self):
         """Approximate poisson errors using sqrt(n)."""
-        nom_values = self.nominal_values
-        super(Map, self).__setattr__(
-            '_hist',
-            unp.uarray(nom_values, np.sqrt(nom_values))
-        )
+        super(Map, self).__setattr__('_std', np.sqrt(self._nom))
+        self._state_changed()
 
     def set_errors(self, error_hist):
         """Manually define the error with an array the same shape as the
@@ -480,15 +827,14 @@ class Map(object):
 
         """
         if error_hist is None:
+            super(Map, self).__setattr__('_std', None)
+        else:
+            self.assert_compat(error_hist)
             super(Map, self).__setattr__(
-                '_hist', self.nominal_values
+                '_std',
+                _storage_array(error_hist, dtype=_error_dtype(self._nom))
             )
-            return
-        self.assert_compat(error_hist)
-        super(Map, self).__setattr__(
-            '_hist',
-            unp.uarray(self._hist, np.ascontiguousarray(error_hist))
-        )
+        self._state_changed()
 
     # TODO: make this return an OrderedDict to organize all of the returned
     # objects
@@ -808,9 +1154,14 @@ class Map(object):
                      for b in new_binning]
         # TODO: should this be a deepcopy rather than a simple veiw of the
         # original hist (the result of np.moveaxis)?
-        new_hist = np.moveaxis(self.hist, source=new_order,
+        new_hist = np.moveaxis(self._nom, source=new_order,
                                destination=orig_order)
-        return {'hist': new_hist, 'binning': new_binning}
+        new_errors = None
+        if self._std is not None:
+            new_errors = np.moveaxis(self._std, source=new_order,
+                                     destination=orig_order)
+        return {'hist': new_hist, 'error_hist': new_errors,
+                'binning': new_binning}
 
     @_new_obj
     def squeeze(self):
@@ -823,8 +1174,10 @@ class Map(object):
 
         """
         new_binning = self.binning.squeeze()
-        new_hist = self.hist.squeeze()
-        return {'hist': new_hist, 'binning': new_binning}
+        new_hist = self._nom.squeeze()
+        new_errors = None if self._std is None else self._std.squeeze()
+        return {'hist': new_hist, 'error_hist': new_errors,
+                'binning': new_binning}
 
     @_new_obj
     def sum(self, axis=None, keepdims=False):
@@ -857,7 +1210,11 @@ class Map(object):
             axis = [axis]
         # Note that the tuple is necessary here (I think...)
         sum_indices = tuple([self.binning.index(dim) for dim in axis])
-        new_hist = self.hist.sum(axis=sum_indices, keepdims=keepdims)
+        new_hist = self._nom.sum(axis=sum_indices, keepdims=keepdims)
+        new_errors = None
+        if self._std is not None:
+            new_errors = np.sqrt(np.square(self._std).sum(axis=sum_indices,
+                                                          keepdims=keepdims))
 
         new_binning = []
         for idx, dim in enumerate(self.binning.dims):
@@ -866,7 +1223,8 @@ class Map(object):
                     new_binning.append(dim.downsample(len(dim)))
             else:
                 new_binning.append(dim)
-        return {'hist': new_hist, 'binning': new_binning}
+        return {'hist': new_hist, 'error_hist': new_errors,
+                'binning': new_binning}
 
     def project(self, axis, keepdims=False):
         """Project all dimensions onto a single `axis`.
@@ -917,10 +1275,16 @@ class Map(object):
         `pisa.core.map.rebin` : function called to do the work
 
         """
-        # TODO: put uncertainties in
-        new_hist = rebin(hist=self.hist, orig_binning=self.binning,
+        new_hist = rebin(hist=self._nom, orig_binning=self.binning,
                          new_binning=new_binning)
-        return {'hist': new_hist, 'binning': new_binning}
+        new_errors = None
+        if self._std is not None:
+            # Errors of merged bins add in quadrature
+            new_errors = np.sqrt(rebin(hist=np.square(self._std),
+                                       orig_binning=self.binning,
+                                       new_binning=new_binning))
+        return {'hist': new_hist, 'error_hist': new_errors,
+                'binning': new_binning}
 
     def downsample(self, *args, **kwargs):
         """Downsample by integer factor(s), summing together merged bins'
@@ -975,7 +1339,7 @@ class Map(object):
                 error_vals = np.empty_like(orig_hist, dtype=np.float64)
                 error_vals[valid_mask] = np.sqrt(orig_hist[valid_mask])
                 error_vals[nan_at] = np.nan
-            return {'hist': unp.uarray(hist_vals, error_vals)}
+            return {'hist': hist_vals, 'error_hist': error_vals}
 
         elif method == 'gauss+poisson':
             random_state = get_random_state(random_state, jumpahead=jumpahead)
@@ -999,7 +1363,7 @@ class Map(object):
                 error_vals = np.empty_like(orig_hist, dtype=np.float64)
                 error_vals[valid_mask] = np.sqrt(orig_hist[valid_mask])
                 error_vals[nan_at] = np.nan
-            return {'hist': unp.uarray(hist_vals, error_vals)}
+            return {'hist': hist_vals, 'error_hist': error_vals}
 
         elif method == 'gauss':
             random_state = get_random_state(random_state, jumpahead=jumpahead)
@@ -1015,7 +1379,7 @@ class Map(object):
                 error_vals = np.empty_like(orig_hist, dtype=np.float64)
                 error_vals[valid_mask] = np.sqrt(orig_hist[valid_mask])
                 error_vals[nan_at] = np.nan
-            return {'hist': unp.uarray(hist_vals, error_vals)}
+            return {'hist': hist_vals, 'error_hist': error_vals}
 
         elif method in ['', 'none']:
             return {}
@@ -1026,27 +1390,29 @@ class Map(object):
     @property
     def shape(self):
         """tuple : shape of the map, akin to `nump.ndarray.shape`"""
-        return self.hist.shape
+        return self._nom.shape
 
     @property
     def size(self):
         """int : total number of elements"""
-        return self.hist.size
+        return self._nom.size
 
     @property
     def num_entries(self):
         """int : total number of weighted entries in all bins"""
-        return np.sum(valid_nominal_values(self.hist))
+        return np.sum(np.ma.masked_invalid(self._nom))
 
     @property
     def serializable_state(self):
         state = OrderedDict()
         state['name'] = self.name
-        state['hist'] = self.nominal_values
+        state['hist'] = _readonly_view(self._nom)
         state['binning'] = self.binning.serializable_state
-        stddevs = self.std_devs
-        stddevs = None if np.all(stddevs == 0) else stddevs
-        state['error_hist'] = stddevs
+        stddevs = self._std
+        if stddevs is not None and np.all(stddevs == 0):
+            stddevs = None
+        state['error_hist'] = (None if stddevs is None
+                               else _readonly_view(stddevs))
         state['hash'] = self.hash
         state['tex'] = self._tex
         state['full_comparison'] = self.full_comparison
@@ -1054,25 +1420,31 @@ class Map(object):
 
     @property
     def hashable_state(self):
+        """OrderedDict : normalized state used for comparisons. This is cached
+        until the map is modified via its methods, attribute setters, or item
+        assignment (the arrays returned by `hist`, `nominal_values`, and
+        `std_devs` are read-only, so these are the only ways to modify it)."""
+        if self._hashable_state_version == self._version:
+            return self._cached_hashable_state
         state = OrderedDict()
         state['name'] = self.name
         if self.normalize_values:
-            state['hist'] = normQuant(self.nominal_values,
-                                      sigfigs=HASH_SIGFIGS)
-            stddevs = normQuant(self.std_devs, sigfigs=HASH_SIGFIGS)
+            state['hist'] = normQuant(self._nom, sigfigs=HASH_SIGFIGS)
         else:
-            state['hist'] = self.nominal_values
-            stddevs = self.std_devs
+            state['hist'] = self._nom
         state['binning'] = self.binning.hashable_state
         # TODO: better check here to see if the contained datatype is unp, as
         # opposed to 0 stddev (which could be the case but the user wants for
         # uncertainties to propagate)
-        if np.all(stddevs == 0):
+        stddevs = self._std
+        if stddevs is None or np.all(stddevs == 0):
             stddevs = None
         elif self.normalize_values:
             stddevs = normQuant(stddevs, sigfigs=HASH_SIGFIGS)
         state['error_hist'] = stddevs
         state['full_comparison'] = self.full_comparison
+        super(Map, self).__setattr__('_cached_hashable_state', state)
+        super(Map, self).__setattr__('_hashable_state_version', self._version)
         return state
 
     @property
@@ -1083,6 +1455,7 @@ class Map(object):
     def normalize_values(self, b):
         assert isinstance(b, bool)
         self._normalize_values = b
+        self._state_changed()
 
     def __getstate__(self):
         return self.serializable_state
@@ -1134,6 +1507,64 @@ class Map(object):
         # syntax
         return cls(**state)
 
+    @classmethod
+    def evaluate(cls, expr, name=None, **operands):
+        """Evaluate an elementwise arithmetic expression of Maps (and scalars)
+        in a single pass, without the temporary Maps and arrays that chaining
+        the arithmetic operators creates. Uses `numexpr` if it is installed
+        and falls back to evaluating `expr` with numpy otherwise; either way,
+        `expr` must follow numexpr's syntax (arithmetic and comparison
+        operators and elementwise functions such as `exp`, `sqrt`, or
+        `where`).
+
+        Uncertainties are not propagated through the expression, so all Maps
+        must be free of errors.
+
+        Parameters
+        ----------
+        expr : string
+            Expression in terms of the names of `operands`, e.g.
+            'a * (b + c) - 2*d'
+
+        name : None or string
+            Name of the resulting Map; defaults to `expr`
+
+        **operands
+            Maps (at least one, all with compatible binning) and scalars
+            referenced in `expr`
+
+        Returns
+        -------
+        Map
+
+        Examples
+        --------
+        >>> m = Map.evaluate('a * (b + c)', a=map_a, b=map_b, c=2.0)
+
+        """
+        maps = [m for m in operands.values() if isinstance(m, Map)]
+        if not maps:
+            raise ValueError('At least one Map must be passed to `evaluate`.')
+        binning = maps[0].binning
+        local_dict = {}
+        for key, operand in operands.items():
+            if isinstance(operand, Map):
+                if operand._std is not None: # pylint: disable=protected-access
+                    raise ValueError(
+                        'Map "%s" passed as operand "%s" has errors, which'
+                        ' `evaluate` does not propagate.' % (operand.name, key)
+                    )
+                binning.assert_compat(operand.binning)
+                operand = operand.nominal_values
+            local_dict[key] = operand
+        if numexpr is None:
+            hist = _evaluate_expr(ast.parse(expr.strip(), mode='eval'),
+                                  local_dict)
+        else:
+            hist = numexpr.evaluate(expr, local_dict=local_dict)
+        return cls(name=expr if name is None else name, hist=hist,
+                   binning=binning)
+
     def assert_compat(self, other):
         if np.isscalar(other) or type(other) is uncertainties.core.Variable:
             return
@@ -1157,17 +1588,34 @@ class Map(object):
         Map object containing one of each bin of this Map
 
         """
-        for i in xrange(self.size):
-            idx_coord = self.binning.index2coord(i)
-            idx_view = [slice(x, x+1) for x in idx_coord]
-            single_bin_map = Map(
-                name=self.name, hist=self.hist[idx_view],
-                binning=self.binning[idx_coord], hash=None, tex=self.tex,
-                full_comparison=self.full_comparison
+        # Derive each dimension's single-bin binnings once, rather than
+        # re-deriving these per bin
+        single_bins = [[dim[i] for i in range(len(dim))]
+                       for dim in self.binning]
+        make_coord = self.binning.coord
+        for idx in self.iterindices():
+            idx_view = tuple([slice(x, x+1) for x in idx])
+            single_bin_map = Map._from_arrays(
+                name=self._name, hist=self._nom[idx_view],
+                error_hist=(None if self._std is None
+                            else self._std[idx_view]),
+                binning=MultiDimBinning(
+                    [bins[x] for bins, x in izip(single_bins, idx)]
+                ),
+                hash=None, tex=self._tex, full_comparison=self.full_comparison
             )
-            single_bin_map.parent_indexer = idx_coord
+            single_bin_map.parent_indexer = make_coord(*idx)
+            super(Map, single_bin_map).__setattr__('_parent', self)
             yield single_bin_map
 
+    def iterindices(self):
+        """Iterator that yields the index (tuple of ints) of each bin in the
+        map, in C order."""
+        it = np.nditer(self._nom, flags=['multi_index'], order='C')
+        while not it.finished:
+            yield it.multi_index
+            it.iternext()
+
     # TODO : example!
     def itercoords(self):
         """Iterator that yields the coordinate of each bin in the map."""
@@ -1178,15 +1626,6 @@ class Map(object):
             return self.hash
         raise ValueError('No hash defined.')
 
-    def __setattr__(self, attr, value):
-        """Only allow setting attributes defined in slots"""
-        if attr not in self._slots:
-            raise ValueError('Attribute "%s" not allowed to be set.' % attr)
-        super(Map, self).__setattr__(attr, value)
-
-    def __getattr__(self, attr):
-        return super(Map, self).__getattribute__(attr)
-
     def _slice_or_index(self, idx):
         """Slice or index into the map. Indexing single element in self.hist
         e.g. hist[1,3] returns a 0D array while hist[1,3:8] returns a 1D array,
@@ -1195,15 +1634,26 @@ class Map(object):
         hist should be).
 
         """
-        new_binning = self.binning[idx]
-
-        new_map = Map(name=self.name,
-                      hist=np.reshape(self.hist[idx], new_binning.shape),
-                      binning=self.binning[idx],
-                      hash=self.hash,
-                      tex=self.tex,
-                      full_comparison=self.full_comparison)
+        new_binning = self._binning[idx]
+        new_shape = new_binning.shape
+
+        new_hist = self._nom[idx]
+        if new_hist.shape != new_shape:
+            new_hist = new_hist.reshape(new_shape)
+        new_errors = None
+        if self._std is not None:
+            new_errors = self._std[idx]
+            if new_errors.shape != new_shape:
+                new_errors = new_errors.reshape(new_shape)
+        new_map = Map._from_arrays(name=self.name,
+                                   hist=new_hist,
+                                   error_hist=new_errors,
+                                   binning=new_binning,
+                                   hash=self.hash,
+                                   tex=self._tex,
+                                   full_comparison=self.full_comparison)
         new_map.parent_indexer = idx
+        super(Map, new_map).__setattr__('_parent', self)
         return new_map
 
     def __getitem__(self, idx):
@@ -1270,7 +1720,8 @@ class Map(object):
         new_order.pop(dim_index)
         new_order = [dim_index] + new_order
         rearranged_map = self.reorder_dimensions(new_order)
-        rearranged_hist = rearranged_map.hist
+        rearranged_hist = rearranged_map._nom
+        rearranged_errors = rearranged_map._std
         rearranged_dims = rearranged_map.binning.dims
 
         # Take all dims except the one being split on
@@ -1294,6 +1745,9 @@ class Map(object):
         for bin_index in bin_indices:
             bin = spliton_dim[bin_index]
             new_hist = rearranged_hist[bin_index, ...]
+            new_errors = None
+            if rearranged_errors is not None:
+                new_errors = rearranged_errors[bin_index, ...]
             if bin.bin_names is not None:
                 bin_name = bin.bin_names[0]
                 bin_tex = '=' + text2tex(bin_name)
@@ -1310,8 +1764,8 @@ class Map(object):
             new_tex = self.tex + ',' + r'{\;}' + spliton_dim.tex + bin_tex
 
             maps.append(
-                Map(name=new_name, hist=new_hist, binning=new_binning,
-                    hash=self.hash, tex=new_tex,
+                Map(name=new_name, hist=new_hist, error_hist=new_errors,
+                    binning=new_binning, hash=self.hash, tex=new_tex,
                     full_comparison=self.full_comparison)
             )
 
@@ -1348,14 +1802,18 @@ class Map(object):
         total_llh : float or binned_llh if binned=True
 
         """
-        expected_values = reduceToHist(expected_values)
+        # Uncertainties are ignored, so avoid creating ufloats for a Map
+        if isinstance(expected_values, Map):
+            expected_values = expected_values.nominal_values
+        else:
+            expected_values = reduceToHist(expected_values)
 
         if binned:
-            return stats.llh(actual_values=self.hist,
+            return stats.llh(actual_values=self.nominal_values,
                              expected_values=expected_values)
 
-        return np.sum(stats.llh(actual_values=self.hist,
-                                expected_values=expected_values))
+        return stats.llh_total(actual_values=self.nominal_values,
+                               expected_values=expected_values)
 
     def conv_llh(self, expected_values, binned=False):
         """Calculate the total convoluted log-likelihood value between this map
@@ -1458,14 +1916,18 @@ class Map(object):
         total_chi2 : float or binned_chi2 if binned=True
 
         """
-        expected_values = reduceToHist(expected_values)
+        # Uncertainties are ignored, so avoid creating ufloats for a Map
+        if isinstance(expected_values, Map):
+            expected_values = expected_values.nominal_values
+        else:
+            expected_values = reduceToHist(expected_values)
 
         if binned:
-            return stats.chi2(actual_values=self.hist,
+            return stats.chi2(actual_values=self.nominal_values,
                               expected_values=expected_values)
 
-        return np.sum(stats.chi2(actual_values=self.hist,
-                                 expected_values=expected_values))
+        return stats.chi2_total(actual_values=self.nominal_values,
+                                expected_values=expected_values)
 
     def metric_total(self, expected_values, metric):
         # TODO: should this use reduceToHist as in chi2 and llh above?
@@ -1476,7 +1938,15 @@ class Map(object):
                              % (metric, stats.ALL_METRICS))
 
     def __setitem__(self, idx, val):
-        return setitem(self.hist, idx, val)
+        nominal_values, std_devs = _split_uncertainties(val)
+        self._nom[idx] = nominal_values
+        if std_devs is not None:
+            if self._std is None:
+                self.set_errors(np.zeros_like(self._nom, dtype=np.float64))
+            self._std[idx] = std_devs
+        elif self._std is not None:
+            self._std[idx] = 0
+        self._state_changed()
 
     @property
     def name(self):
@@ -1487,7 +1957,9 @@ class Map(object):
     def name(self, value):
         """map name"""
         assert isinstance(value, basestring)
-        return super(Map, self).__setattr__('_name', value)
+        super(Map, self).__setattr__('_name', value)
+        self._state_changed()
+        _bump_map_metadata_epoch()
 
     @property
     def tex(self):
@@ -1513,21 +1985,57 @@ class Map(object):
         """Hash must be an immutable type (i.e., have a __hash__ method)"""
         assert hasattr(value, '__hash__')
         super(Map, self).__setattr__('_hash', value)
+        _bump_map_metadata_epoch()
+
+    @property
+    def content_hash(self):
+        """int : Hash computed from the raw bytes of the values and errors
+        together with the name, tex, and binning. Uses xxhash if it is
+        installed (MD5 otherwise) and is cached until the map is modified (see
+        `hashable_state`). Unlike `hash`, this is always
+        defined, but it is byte-exact (maps that compare equal within
+        precision can have different content hashes), so it is not used for
+        `__hash__`."""
+        if self._content_hash_version == self._version:
+            return self._cached_content_hash
+        hasher = hashlib.md5() if xxhash is None else xxhash.xxh3_64()
+        hasher.update(self._nom.view(np.uint8))
+        if self._std is not None:
+            hasher.update(self._std.view(np.uint8))
+        data_hash, = struct.unpack('<q', hasher.digest()[:8])
+        content_hash = hash((data_hash, str(self._nom.dtype), self._name,
+                             self._tex, self._binning.hash))
+        super(Map, self).__setattr__('_cached_content_hash', content_hash)
+        super(Map, self).__setattr__('_content_hash_version', self._version)
+        return content_hash
 
     @property
     def hist(self):
-        """numpy.ndarray : Histogram array underlying the Map"""
-        return self._hist
+        """numpy.ndarray : Read-only histogram array underlying the Map. If
+        errors are set, this is an `uncertainties.unumpy` object array
+        constructed from `nominal_values` and `std_devs` upon each access (use
+        those properties for cheap access to the values), otherwise a view of
+        the values. Use item assignment on the Map itself (e.g.
+        `m[idx] = val`) to modify it."""
+        if self._std is None:
+            return _readonly_view(self._nom)
+        hist = unp.uarray(self._nom, self._std)
+        hist.setflags(write=False)
+        return hist
 
     @property
     def nominal_values(self):
-        """numpy.ndarray : Bin values stripped of uncertainties"""
-        return unp.nominal_values(self._hist)
+        """numpy.ndarray : Read-only view of the bin values stripped of
+        uncertainties"""
+        return _readonly_view(self._nom)
 
     @property
     def std_devs(self):
-        """numpy.ndarray : Uncertainties (standard deviations) per bin"""
-        return unp.std_devs(self._hist)
+        """numpy.ndarray : Read-only view of the uncertainties (standard
+        deviations) per bin"""
+        if self._std is None:
+            return _readonly_view(np.zeros_like(self._nom, dtype=np.float64))
+        return _readonly_view(self._std)
 
     @property
     def binning(self):
@@ -1543,6 +2051,7 @@ class Map(object):
     def full_comparison(self, value):
         assert isinstance(value, bool)
         super(Map, self).__setattr__('_full_comparison', value)
+        self._state_changed()
 
     # Common mathematical operators
 
@@ -1551,64 +2060,45 @@ class Map(object):
         state_updates = {
             #'name': "|%s|" % (self.name,),
             #'tex': r"{\left| %s \right|}" % strip_outer_parens(self.tex),
-            'hist': np.abs(self.hist)
+            'hist': np.abs(self._nom),
+            'error_hist': deepcopy(self._std),
         }
         return state_updates
 
     @_new_obj
-    def __add__(self, other):
-        """Add `other` to self"""
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "(%s + %s)" % (self.name, other),
-                #'tex': r"{(%s + %s)}" % (self.tex, other),
-                'hist': self.hist + other
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "(%s + array)" % self.name,
-                #'tex': r"{(%s + X)}" % self.tex,
-                'hist': self.hist + other
-            }
-        elif isinstance(other, Map):
-            state_updates = {
-                #'name': "(%s + %s)" % (self.name, other.name),
-                #'tex': r"{(%s + %s)}" % (self.tex, other.tex),
-                'hist': self.hist + other.hist,
-                'full_comparison': (self.full_comparison or
-                                    other.full_comparison),
-            }
+    def _binop(self, op, err_func, other, reflected=False):
+        """Apply the binary operation `op` (a numpy ufunc) to this map and
+        `other` (scalar, uncertainties number, array, or Map), propagating
+        errors via `err_func`. If `reflected` is True, `other` is taken to be
+        the left-hand operand."""
+        if isinstance(other, Map):
+            other_nom, other_std = other._nom, other._std
+            full_comparison = self.full_comparison or other.full_comparison
+        elif (np.isscalar(other) or type(other) is uncertainties.core.Variable
+              or isinstance(other, np.ndarray)):
+            other_nom, other_std = _split_uncertainties(other)
+            full_comparison = self.full_comparison
         else:
             type_error(other)
-        return state_updates
+        if reflected:
+            hist = op(other_nom, self._nom)
+            error_hist = err_func(other_nom, other_std, self._nom, self._std,
+                                  hist)
+        else:
+            hist = op(self._nom, other_nom)
+            error_hist = err_func(self._nom, self._std, other_nom, other_std,
+                                  hist)
+        return {'hist': hist, 'error_hist': error_hist,
+                'full_comparison': full_comparison}
+
+    def __add__(self, other):
+        """Add `other` to self"""
+        return self._binop(np.add, _err_add, other)
 
     #def __cmp__(self, other):
 
-    @_new_obj
     def __div__(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "(%s / %s)" % (self.name, other),
-                #'tex': r"{(%s / %s)}" % (self.tex, other),
-                'hist': self.hist / other
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "(%s / array)" % self.name,
-                #'tex': r"{(%s / X)}" % self.tex,
-                'hist': self.hist / other
-            }
-        elif isinstance(other, Map):
-            state_updates = {
-                #'name': "(%s / %s)" % (self.name, other.name),
-                #'tex': r"{(%s / %s)}" % (self.tex, other.tex),
-                'hist': self.hist / other.hist,
-                'full_comparison': (self.full_comparison or
-                                    other.full_comparison),
-            }
-        else:
-            type_error(other)
-        return state_updates
+        return self._binop(np.true_divide, _err_div, other)
 
     def __truediv__(self, other):
         return self.__div__(other)
@@ -1643,12 +2133,33 @@ class Map(object):
         if isinstance(other, Map):
             if (self.full_comparison or other.full_comparison
                     or self.hash is None or other.hash is None):
-                return recursiveEquality(self.hashable_state,
-                                         other.hashable_state)
+                return self._full_equality(other)
             return self.hash == other.hash
 
         type_error(other)
 
+    def _full_equality(self, other):
+        """Compare the full state of this map with that of `other` (a Map),
+        deciding the cases of identical objects, mismatched metadata or
+        binning, and exactly equal arrays without resorting to the (more
+        costly) `recursiveEquality` on the normalized `hashable_state`s."""
+        # pylint: disable=protected-access
+        if self is other:
+            return True
+        if (self._nom.shape != other._nom.shape
+                or self._name != other._name
+                or self.full_comparison != other.full_comparison
+                or (self._binning is not other._binning
+                    and self._binning != other._binning)):
+            return False
+        if (np.array_equal(self._nom, other._nom)
+                and (self._std is other._std
+                     or (self._std is not None and other._std is not None
+                         and np.array_equal(self._std, other._std)))):
+            return True
+        # Arrays might still be equal within the precision of the comparison
+        return recursiveEquality(self.hashable_state, other.hashable_state)
+
     @_new_obj
     def log(self):
         """Take natural logarithm of map's values, returning a new map.
@@ -1658,10 +2169,15 @@ class Map(object):
         log_map : Map
 
         """
+        error_hist = None
+        if self._std is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                error_hist = _error_term(1 / self._nom, self._std)
         state_updates = {
             #'name': "log(%s)" % self.name,
             #'tex': r"\ln\left( %s \right)" % self.tex,
-            'hist': np.log(self.hist)
+            'hist': np.log(self._nom),
+            'error_hist': error_hist,
         }
         return state_updates
 
@@ -1674,38 +2190,21 @@ class Map(object):
         log10_map : Map
 
         """
+        error_hist = None
+        if self._std is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                error_hist = _error_term(1 / (self._nom * np.log(10)),
+                                         self._std)
         state_updates = {
             #'name': "log10(%s)" % self.name,
             #'tex': r"\log_{10}\left( %s \right)" % self.tex,
-            'hist': np.log10(self.hist)
+            'hist': np.log10(self._nom),
+            'error_hist': error_hist,
         }
         return state_updates
 
-    @_new_obj
     def __mul__(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "%s * %s" % (other, self.name),
-                #'tex': r"%s \cdot %s" % (other, self.tex),
-                'hist': self.hist * other
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "array * %s" % self.name,
-                #'tex': r"X \cdot %s" % self.tex,
-                'hist': self.hist * other,
-            }
-        elif isinstance(other, Map):
-            state_updates = {
-                #'name': "%s * %s" % (self.name, other.name),
-                #'tex': r"%s \cdot %s" % (self.tex, other.tex),
-                'hist': self.hist * other.hist,
-                'full_comparison': (self.full_comparison or
-                                    other.full_comparison),
-            }
-        else:
-            type_error(other)
-        return state_updates
+        return self._binop(np.multiply, _err_mul, other)
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -1715,88 +2214,28 @@ class Map(object):
         state_updates = {
             #'name': "-%s" % self.name,
             #'tex': r"-%s" % self.tex,
-            'hist': -self.hist,
+            'hist': -self._nom,
+            'error_hist': deepcopy(self._std),
         }
         return state_updates
 
-    @_new_obj
     def __pow__(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "%s**%s" % (self.name, other),
-                #'tex': "%s^{%s}" % (self.tex, other),
-                'hist': np.power(self.hist, other)
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "%s**(array)" % self.name,
-                #'tex': r"%s^{X}" % self.tex,
-                'hist': np.power(self.hist, other),
-            }
-        elif isinstance(other, Map):
-            state_updates = {
-                #'name': "%s**(%s)" % (self.name,
-                #                      strip_outer_parens(other.name)),
-                #'tex': r"%s^{%s}" % (self.tex, strip_outer_parens(other.tex)),
-                'hist': np.power(self.hist, other.hist),
-                'full_comparison': (self.full_comparison or
-                                    other.full_comparison),
-            }
-        else:
-            type_error(other)
-        return state_updates
+        return self._binop(np.power, _err_pow, other)
 
     def __radd__(self, other):
         return self + other
 
     def __rdiv__(self, other):
-        if isinstance(other, Map):
-            return other / self
-        return self.__rdiv(other)
+        return self._binop(np.true_divide, _err_div, other, reflected=True)
 
-    @_new_obj
-    def __rdiv(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "(%s / %s)" % (other, self.name),
-                #'tex': "{(%s / %s)}" % (other, self.tex),
-                'hist': other / self.hist,
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "array / %s" % self.name,
-                #'tex': "{(X / %s)}" % self.tex,
-                'hist': other / self.hist,
-            }
-        else:
-            type_error(other)
-        return state_updates
+    def __rtruediv__(self, other):
+        return self.__rdiv__(other)
 
     def __rmul__(self, other):
         return self * other
 
     def __rsub__(self, other):
-        if isinstance(other, Map):
-            return other - self
-        return self.__rsub(other)
-
-    @_new_obj
-    def __rsub(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "(%s - %s)" % (other, self.name),
-                #'tex': "{(%s - %s)}" % (other, self.tex),
-                'hist': other - self.hist,
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "(array - %s)" % self.name,
-                #'tex': "{(X - %s)}" % self.tex,
-                'hist': other - self.hist,
-            }
-        else:
-            type_error(other)
-        return state_updates
+        return self._binop(np.subtract, _err_add, other, reflected=True)
 
     @_new_obj
     def sqrt(self):
@@ -1807,39 +2246,21 @@ class Map(object):
         sqrt_map : Map
 
         """
+        hist = np.sqrt(self._nom)
+        error_hist = None
+        if self._std is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                error_hist = _error_term(0.5 / hist, self._std)
         state_updates = {
             #'name': "sqrt(%s)" % self.name,
             #'tex': r"\sqrt{%s}" % self.tex,
-            #'hist': np.asarray(unp.sqrt(self.hist), dtype='float'),
-            'hist': unp.sqrt(self.hist),
+            'hist': hist,
+            'error_hist': error_hist,
         }
         return state_updates
 
-    @_new_obj
     def __sub__(self, other):
-        if np.isscalar(other) or type(other) is uncertainties.core.Variable:
-            state_updates = {
-                #'name': "(%s - %s)" % (self.name, other),
-                #'tex': "{(%s - %s)}" % (self.tex, other),
-                'hist': self.hist - other,
-            }
-        elif isinstance(other, np.ndarray):
-            state_updates = {
-                #'name': "(%s - array)" % self.name,
-                #'tex': "{(%s - X)}" % self.tex,
-                'hist': self.hist - other,
-            }
-        elif isinstance(other, Map):
-            state_updates = {
-                #'name': "%s - %s" % (self.name, other.name),
-                #'tex': "{(%s - %s)}" % (self.tex, other.tex),
-                'hist': self.hist - other.hist,
-                'full_comparison': (self.full_comparison or
-                                    other.full_comparison),
-            }
-        else:
-            type_error(other)
-        return state_updates
+        return self._binop(np.subtract, _err_add, other)
 
 # TODO: instantiate individual maps from dicts if passed as such, so user
 # doesn't have to instantiate each map. Also, check for name collisions with
@@ -1876,23 +2297,29 @@ class MapSet(object):
         (different) name.
 
     """
-    __slots = ('_name', '_hash', 'hash')
+    __slots__ = ('_maps', 'tex', 'collate_by_name', 'collate_by_num', '_name',
+                 '_names_hashes_cache')
     __state_attrs = ('name', 'maps', 'tex', 'hash', 'collate_by_name')
     def __init__(self, maps, name=None, tex=None, hash=None,
                  collate_by_name=True):
         if isinstance(maps, Map):
             maps = [maps]
 
-        maps_ = []
-        for m in maps:
-            if isinstance(m, Map):
-                maps_.append(m)
-            elif isinstance(m, MapSet):
-                maps_.extend(m)
-            else:
-                maps_.append(Map(**m))
+        # Fast path for the common case of a sequence containing only Maps
+        if (isinstance(maps, (list, tuple))
+                and all(type(m) is Map for m in maps)): # pylint: disable=unidiomatic-typecheck
+            maps_ = list(maps)
+        else:
+            maps_ = []
+            for m in maps:
+                if isinstance(m, Map):
+                    maps_.append(m)
+                elif isinstance(m, MapSet):
+                    maps_.extend(m)
+                else:
+                    maps_.append(Map(**m))
 
-        super(MapSet, self).__setattr__('maps', maps_)
+        self.maps = maps_
         super(MapSet, self).__setattr__('name', name)
         super(MapSet, self).__setattr__('tex', tex)
         super(MapSet, self).__setattr__(
@@ -2158,7 +2585,7 @@ class MapSet(object):
             if len(maps_to_combine) == 0:
                 raise ValueError('No map names match `regex` "%s"' % pattern)
             if len(maps_to_combine) > 1:
-                m = reduce(add, maps_to_combine)
+                m = _sum_maps(maps_to_combine)
                 try:
                     nufig = NuFlavIntGroup(names_to_combine)
                     new_name = make_valid_python_name(str(nufig))
@@ -2255,7 +2682,7 @@ class MapSet(object):
             if len(maps_to_combine) == 0:
                 raise ValueError('No map names match `expr` "%s"' % expr)
             if len(maps_to_combine) > 1:
-                m = reduce(add, maps_to_combine)
+                m = _sum_maps(maps_to_combine)
                 try:
                     nufig = NuFlavIntGroup(names_to_combine)
                     new_name = make_valid_python_name(str(nufig))
@@ -2310,17 +2737,41 @@ class MapSet(object):
         return rslt
 
     def __eq__(self, other):
+        """Check if the contained maps are equal. As for `Map.__eq__`, if all
+        maps (in both sets) have hashes and none requires a full comparison,
+        only the names and hashes are compared. Otherwise the full states of
+        the maps are compared."""
+        if self is other:
+            return True
+        if isinstance(other, MapSet):
+            names, hashes = self._names_and_hashes()
+            other_names, other_hashes = other._names_and_hashes()
+            if (names == other_names
+                    and None not in hashes and None not in other_hashes
+                    and not any([m.full_comparison for m in self.maps])
+                    and not any([m.full_comparison for m in other.maps])):
+                return hashes == other_hashes
         return recursiveEquality(self.hashable_state, other.hashable_state)
 
+    @property
+    def maps(self):
+        """list of Map : the maps contained in the set"""
+        return self._maps
+
+    @maps.setter
+    def maps(self, maps):
+        super(MapSet, self).__setattr__('_maps', _MapList(maps))
+        super(MapSet, self).__setattr__('_names_hashes_cache', (None, ))
+
     @property
     def name(self):
         """string : name of the map (legal Python name)"""
-        return super(MapSet, self).__getattribute__('_name')
+        return self._name
 
     @name.setter
     def name(self, name):
         """string : name of the map (legal Python name)"""
-        return super(MapSet, self).__setattr__('_name', name)
+        self._name = name
 
     @property
     def hash(self):
@@ -2333,12 +2784,23 @@ class MapSet(object):
               the map set is also None (i.e., invalid)
 
         """
-        hashes = self.hashes
-        if all([(h is not None and h == hashes[0]) for h in hashes]):
-            return hashes[0]
-        if all([(h is not None) for h in hashes]):
-            return hash_obj(hashes)
-        return None
+        cache = self._metadata_cache()
+        derived = cache[4]
+        if 'hash' in derived:
+            return derived['hash']
+        hashes = cache[2]
+        first_hash = hashes[0]
+        all_same = True
+        set_hash = None
+        for h in hashes:
+            if h is None:
+                break
+            if all_same and h != first_hash:
+                all_same = False
+        else:
+            set_hash = first_hash if all_same else hash_obj(list(hashes))
+        derived['hash'] = set_hash
+        return set_hash
 
     @hash.setter
     def hash(self, val):
@@ -2348,15 +2810,43 @@ class MapSet(object):
             for m in self:
                 setattr(m, 'hash', val)
 
+    def _metadata_cache(self):
+        """Names and hashes of the contained maps, a dict of the maps by name,
+        and a dict for values derived from these (e.g. the hash of the set),
+        cached until the list of maps is modified or replaced or any map's
+        name or hash changes"""
+        maps = self._maps
+        key = (_map_metadata_epoch, maps.version)
+        cache = self._names_hashes_cache
+        if cache[0] != key:
+            names = tuple(map(_get_name, maps))
+            maps_by_name = {}
+            # The first of several maps with the same name is the one found
+            for name, mp in izip(names, maps):
+                maps_by_name.setdefault(name, mp)
+            cache = (key, names, tuple(map(_get_hash, maps)),
+                     maps_by_name, {})
+            super(MapSet, self).__setattr__('_names_hashes_cache', cache)
+        return cache
+
+    def _names_and_hashes(self):
+        """Tuples of the names and hashes of the contained maps"""
+        cache = self._metadata_cache()
+        return cache[1], cache[2]
+
+    def _maps_by_name(self):
+        """dict of the contained maps by name (do not modify)"""
+        return self._metadata_cache()[3]
+
     @property
     def names(self):
         """list of strings : name of each map"""
-        return [mp.name for mp in self]
+        return list(self._names_and_hashes()[0])
 
     @property
     def hashes(self):
         """list of int : hash of each map"""
-        return [mp.hash for mp in self]
+        return list(self._names_and_hashes()[1])
 
     def hash_maps(self, map_names=None):
         """Generate a hash on the contained maps (i.e. exclude state pertaining
@@ -2376,32 +2866,66 @@ class MapSet(object):
             be None.
 
         """
-        if map_names is None:
-            map_names = [m.name for m in self]
-        hashes = [m.hash for m in self if m.name in map_names]
-        if all([(h != None) for h in hashes]):
-            return hash_obj(hashes)
-        return None
+        names, all_hashes = self._names_and_hashes()
+        if map_names is not None:
+            map_names = set(map_names)
+        hashes = []
+        for name, h in izip(names, all_hashes):
+            if map_names is not None and name not in map_names:
+                continue
+            if h is None:
+                return None
+            hashes.append(h)
+        return hash_obj(hashes)
 
     def collate_with_names(self, vals):
-        ret_dict = OrderedDict()
-        for name, val in izip(self.names, vals):
-            setitem(ret_dict, name, val)
-        return ret_dict
+        return OrderedDict(izip(self._names_and_hashes()[0], vals))
 
     def find_map(self, value):
-        idx = None
-        if isinstance(value, Map):
-            pass
-        elif isinstance(value, basestring):
-            try:
-                idx = self.names.index(value)
-            except ValueError:
-                pass
-        if idx is None:
-            raise ValueError('Could not find map name "%s" among maps %s'
-                             % (value, self.names))
-        return self[idx]
+        if isinstance(value, basestring):
+            mp = self._maps_by_name().get(value)
+            if mp is not None:
+                return mp
+        raise ValueError('Could not find map name "%s" among maps %s'
+                         % (value, self.names))
+
+    def _corresponding_maps(self, other):
+        """List of the maps in MapSet `other` corresponding to each map in
+        this set, by name or by position according to `collate_by_name`"""
+        if self.collate_by_num:
+            return [other.maps[map_num] for map_num in xrange(len(self))]
+        maps_by_name = other._maps_by_name() # pylint: disable=protected-access
+        return [maps_by_name[name] if name in maps_by_name
+                else other.find_map(name) for name in self.names]
+
+    def _args_per_map(self, args):
+        """Create a list of args for *each* map in this map set: If an arg is a
+        MapSet, convert that arg into the map in that set corresponding to the
+        same map in this set (likewise for each MapSet in an iterable arg).
+        Other args are passed on as-is to every map."""
+        num_maps = len(self)
+        arg_columns = []
+        for arg in args:
+            if (type(arg) in _PER_SET_ARG_TYPES or np.isscalar(arg) or
+                    type(arg) is uncertainties.core.Variable or
+                    isinstance(arg, (basestring, np.ndarray))):
+                arg_columns.append([arg] * num_maps)
+            elif isinstance(arg, MapSet):
+                arg_columns.append(self._corresponding_maps(arg))
+
+            # TODO: test to make sure this works for e.g. metric_per_map
+            elif isinstance(arg, Iterable):
+                item_columns = [self._corresponding_maps(item) for item in arg
+                                if isinstance(item, MapSet)]
+                arg_columns.append(
+                    [[column[map_num] for column in item_columns]
+                     for map_num in xrange(num_maps)]
+                )
+            else:
+                raise TypeError('Unhandled arg %s / type %s'
+                                % (arg, type(arg)))
+        return [[column[map_num] for column in arg_columns]
+                for map_num in xrange(num_maps)]
 
     def apply_to_maps(self, attr, *args, **kwargs):
         if len(kwargs) != 0:
@@ -2410,9 +2934,13 @@ class MapSet(object):
             attrname = attr.__name__
         else:
             attrname = attr
-        do_not_have_attr = np.array([(not hasattr(mp, attrname))
-                                     for mp in self.maps])
-        if np.any(do_not_have_attr):
+        # Retrieve the corresponding values/callables from contained maps in a
+        # single pass, only working out which maps lack `attr` upon failure
+        try:
+            val_per_map = map(attrgetter(attrname), self.maps)
+        except AttributeError:
+            do_not_have_attr = np.array([(not hasattr(mp, attrname))
+                                         for mp in self.maps])
             missing_in_names = ', '.join(
                 np.array(self.names)[do_not_have_attr]
             )
@@ -2423,9 +2951,6 @@ class MapSet(object):
                 % (missing_in_names, num_missing, num_total, attrname)
             )
 
-        # Retrieve the corresponding callables from contained maps
-        val_per_map = [getattr(mp, attr) for mp in self]
-
         if not all([hasattr(meth, '__call__') for meth in val_per_map]):
             # If all results are maps, populate a new map set & return that
             if all([isinstance(r, Map) for r in val_per_map]):
@@ -2439,38 +2964,7 @@ class MapSet(object):
         # Rename for clarity
         method_per_map = val_per_map
 
-        # Create a set of args for *each* map in this map set: If an arg is a
-        # MapSet, convert that arg into the map in that set corresponding to
-        # the same map in this set.
-        args_per_map = []
-        for map_num, mp in enumerate(self):
-            map_name = mp.name
-            this_map_args = []
-            for arg in args:
-                if (np.isscalar(arg) or
-                        type(arg) is uncertainties.core.Variable or
-                        isinstance(arg, (basestring, np.ndarray))):
-                    this_map_args.append(arg)
-                elif isinstance(arg, MapSet):
-                    if self.collate_by_name:
-                        this_map_args.append(arg[map_name])
-                    elif self.collate_by_num:
-                        this_map_args.append(arg[map_num])
-
-                # TODO: test to make sure this works for e.g. metric_per_map
-                elif isinstance(arg, Iterable):
-                    list_arg = []
-                    for item in arg:
-                        if isinstance(item, MapSet):
-                            if self.collate_by_name:
-                                list_arg.append(item[map_name])
-                            elif self.collate_by_num:
-                                list_arg.append(item[map_num])
-                    this_map_args.append(list_arg)
-                else:
-                    raise TypeError('Unhandled arg %s / type %s'
-                                    % (arg, type(arg)))
-            args_per_map.append(this_map_args)
+        args_per_map = self._args_per_map(args)
 
         # Make the method calls and collect returned values
         returned_vals = [meth(*args)
@@ -2489,7 +2983,7 @@ class MapSet(object):
         return self.collate_with_names(returned_vals)
 
     def __contains__(self, name):
-        return name in [m.name for m in self]
+        return name in self._maps_by_name()
 
     #def __setattr__(self, attr, val):
     #    print '__setattr__ being accessed, attr = %s, val = %s' %(attr, val)
@@ -2503,8 +2997,9 @@ class MapSet(object):
     #        return self.collate_with_names(returned_vals)
 
     def __getattr__(self, attr):
-        if attr in [m.name for m in self]:
-            return self[attr]
+        mp = self._maps_by_name().get(attr)
+        if mp is not None:
+            return mp
         return self.apply_to_maps(attr)
 
     def __iter__(self):
@@ -2551,50 +3046,120 @@ class MapSet(object):
         raise TypeError('getitem does not support `item` of type %s'
                         % type(item))
 
+    def _map_op(self, method, *args):
+        """Call the (unbound) Map `method` on each contained map, with any
+        MapSet in `args` resolved to the corresponding map. As opposed to
+        `apply_to_maps`, no attribute lookups are needed on the maps, hence
+        this is used for the arithmetic operators.
+
+        Returns a MapSet if `method` returns a Map for all maps; otherwise an
+        OrderedDict of the returned values by map name.
+
+        """
+        if args:
+            args_per_map = self._args_per_map(args)
+            returned_vals = [method(mp, *mp_args) for mp, mp_args
+                             in izip(self.maps, args_per_map)]
+        else:
+            returned_vals = [method(mp) for mp in self.maps]
+        if all([isinstance(r, Map) for r in returned_vals]):
+            return MapSet(maps=returned_vals, name=self.name, tex=self.tex,
+                          collate_by_name=self.collate_by_name)
+        return self.collate_with_names(returned_vals)
+
+    def _stacked_nominal_values(self):
+        """Nominal values of all contained maps stacked into a single array of
+        shape (num maps,) + map shape, or None if the maps are not all of the
+        same shape and dtype (with multi-dimensional binnings) or if any map
+        has errors."""
+        # pylint: disable=protected-access
+        if len(self.maps) == 0:
+            return None
+        shape, dtype = self.maps[0]._nom.shape, self.maps[0]._nom.dtype
+        if len(shape) == 0:
+            return None
+        for mp in self.maps:
+            if (mp._std is not None or mp._nom.shape != shape
+                    or mp._nom.dtype != dtype
+                    or not isinstance(mp._binning, MultiDimBinning)):
+                return None
+        return np.stack([mp._nom for mp in self.maps])
+
+    def _binop(self, op, method, val, reflected=False):
+        """Apply the binary operation `op` (a numpy ufunc, the one used by the
+        Map `method`) with `val` to each contained map.
+
+        For a bare scalar `val` and maps of equal shape without errors, `op`
+        is applied once to the stacked values of all maps and the new maps
+        are views into the result; otherwise, this is equivalent to calling
+        `method` on each map (see `_map_op`).
+
+        """
+        # pylint: disable=protected-access
+        if np.isscalar(val) and not isinstance(val, basestring):
+            stacked = self._stacked_nominal_values()
+            if stacked is not None:
+                hist = op(val, stacked) if reflected else op(stacked, val)
+                maps = [
+                    Map._from_arrays(
+                        name=mp._name, hist=mp_hist, error_hist=None,
+                        binning=mp._binning, hash=mp._hash, tex=mp._tex,
+                        full_comparison=mp._full_comparison
+                    )
+                    for mp, mp_hist in izip(self.maps, hist)
+                ]
+                return MapSet(maps=maps, name=self.name, tex=self.tex,
+                              collate_by_name=self.collate_by_name)
+        return self._map_op(method, val)
+
     def __abs__(self):
-        return self.apply_to_maps('__abs__')
+        return self._map_op(Map.__abs__)
 
     def __add__(self, val):
-        return self.apply_to_maps('__add__', val)
+        return self._binop(np.add, Map.__add__, val)
 
     def __truediv__(self, val):
-        return self.apply_to_maps('__truediv__', val)
+        return self._binop(np.true_divide, Map.__truediv__, val)
 
     def __div__(self, val):
-        return self.apply_to_maps('__div__', val)
+        return self._binop(np.true_divide, Map.__div__, val)
 
     def log(self):
-        return self.apply_to_maps('log')
+        return self._map_op(Map.log)
 
     def log10(self):
-        return self.apply_to_maps('log10')
+        return self._map_op(Map.log10)
 
     def __mul__(self, val):
-        return self.apply_to_maps('__mul__', val)
+        return self._binop(np.multiply, Map.__mul__, val)
 
     def __neg__(self):
-        return self.apply_to_maps('__neg__')
+        return self._map_op(Map.__neg__)
 
     def __pow__(self, val):
-        return self.apply_to_maps('__pow__', val)
+        return self._binop(np.power, Map.__pow__, val)
 
     def __radd__(self, val):
-        return self.apply_to_maps('__radd__', val)
+        return self._binop(np.add, Map.__radd__, val)
 
     def __rdiv__(self, val):
-        return self.apply_to_maps('__rdiv__', val)
+        return self._binop(np.true_divide, Map.__rdiv__, val, reflected=True)
+
+    def __rtruediv__(self, val):
+        return self._binop(np.true_divide, Map.__rtruediv__, val,
+                           reflected=True)
 
     def __rmul__(self, val):
-        return self.apply_to_maps('__rmul__', val)
+        return self._binop(np.multiply, Map.__rmul__, val)
 
     def __rsub__(self, val):
-        return self.apply_to_maps('__rsub__', val)
+        return self._binop(np.subtract, Map.__rsub__, val, reflected=True)
 
     def sqrt(self):
-        return self.apply_to_maps('sqrt')
+        return self._map_op(Map.sqrt)
 
     def __sub__(self, val):
-        return self.apply_to_maps('__sub__', val)
+        return self._binop(np.subtract, Map.__sub__, val)
 
     def sum(self, *args, **kwargs):
         return MapSet(maps=[m.sum(*args, **kwargs) for m in self],
@@ -2688,13 +3253,12 @@ class MapSet(object):
                       collate_by_name=self.collate_by_name)
 
     def metric_per_map(self, expected_values, metric):
+        binned = False
         if isinstance(metric, basestring):
             metric = metric.lower()
             if 'binned_' in metric:
                 metric = metric.replace('binned_', '')
                 binned = True
-            else:
-                binned = False
         if metric in stats.ALL_METRICS:
             return self.apply_to_maps(metric, expected_values, binned)
         else:
@@ -2702,13 +3266,40 @@ class MapSet(object):
                              % (metric, stats.ALL_METRICS))
 
     def metric_total(self, expected_values, metric):
-        return np.sum(self.metric_per_map(expected_values, metric).values())
+        """Sum of `metric` over all maps. For the (non-binned) metrics in
+        `stats.ALL_METRICS`, the per-map totals are accumulated directly
+        rather than collated by map name first; chi2 and llh against a MapSet
+        are computed in a single call over the values of all maps."""
+        # pylint: disable=protected-access
+        if (not isinstance(metric, basestring)
+                or metric.lower() not in stats.ALL_METRICS):
+            # Per-map values can be arrays (of differing shapes), so first
+            # reduce each map's values separately
+            return np.sum([np.sum(val) for val in
+                           self.metric_per_map(expected_values,
+                                               metric).values()])
+        metric = metric.lower()
+        if (metric in ('chi2', 'llh') and isinstance(expected_values, MapSet)
+                and len(self.maps) > 0):
+            expected_maps = self._corresponding_maps(expected_values)
+            if all([mp._nom.shape == exp._nom.shape
+                    for mp, exp in izip(self.maps, expected_maps)]):
+                actual = np.concatenate([mp._nom.ravel() for mp in self.maps])
+                expected = np.concatenate([exp._nom.ravel()
+                                           for exp in expected_maps])
+                if metric == 'chi2':
+                    return stats.chi2_total(actual, expected)
+                return stats.llh_total(actual, expected)
+        return math.fsum(
+            getattr(mp, metric)(*args) for mp, args
+            in izip(self.maps, self._args_per_map([expected_values]))
+        )
 
     def chi2_per_map(self, expected_values):
         return self.apply_to_maps('chi2', expected_values)
 
     def chi2_total(self, expected_values):
-        return np.sum(self.chi2_per_map(expected_values))
+        return self.metric_total(expected_values, 'chi2')
 
     def fluctuate(self, method, random_state=None, jumpahead=0):
         """Add fluctuations to the maps in the set and return as a new MapSet.
@@ -2730,7 +3321,7 @@ class MapSet(object):
         return self.apply_to_maps('llh', expected_values)
 
     def llh_total(self, expected_values):
-        return np.sum(self.llh(expected_values))
+        return self.metric_total(expected_values, 'llh')
 
     def set_poisson_errors(self):
         return self.apply_to_maps('set_poisson_errors')
@@ -2885,6 +3476,26 @@ def test_Map():
     r = m1 / m2
     assert r == ufloat(0.5, 0.5)
     logging.debug(str((r, '=', r[0, 0])))
+
+    # Errors propagated on the separately-stored nominal values and standard
+    # deviations must agree with `uncertainties` for uncorrelated operands
+    a_vals = unp.uarray(np.linspace(1, 5, m1.size).reshape(m1.shape), 0.1)
+    b_vals = unp.uarray(np.linspace(2, 3, m1.size).reshape(m1.shape), 0.2)
+    ma = Map(name='a', hist=a_vals, binning=m1.binning)
+    mb = Map(name='b', hist=b_vals, binning=m1.binning)
+    for result, expected in [(ma + mb, a_vals + b_vals),
+                             (ma - mb, a_vals - b_vals),
+                             (ma * mb, a_vals * b_vals),
+                             (ma / mb, a_vals / b_vals),
+                             (ma**mb, a_vals**b_vals),
+                             (ma**2, a_vals**2),
+                             (ma.sqrt(), unp.sqrt(a_vals)),
+                             (ma.log10(), unp.log10(a_vals))]:
+        assert np.allclose(result.nominal_values, unp.nominal_values(expected))
+        assert np.allclose(result.std_devs, unp.std_devs(expected))
+    total = ma.sum()
+    assert np.isclose(total.nominal_value, np.sum(a_vals).nominal_value)
+    assert np.isclose(total.std_dev, np.sum(a_vals).std_dev)
     logging.debug(str(([b.binning.energy.midpoints[0]
                         for b in m1.iterbins()][0:2])))
 
@@ -2925,6 +3536,179 @@ def test_Map():
         assert m_orig[0, :, 0].binning[dim] == m_new[0, 0, :].binning[dim]
         assert m_orig[0, 0, :].binning[dim] == m_new[:, 0, 0].binning[dim]
 
+    # Cached hashable state must be invalidated when the map is modified
+    m_mod = m_orig * 1
+    state = m_mod.hashable_state
+    assert m_mod.hashable_state is state
+    assert m_mod == m_orig
+    m_mod[0, 0, 0] = -1
+    assert m_mod.hashable_state is not state
+    assert m_mod != m_orig
+
+    # ...including item assignment on slices and bins of a map, which share
+    # its values; maps and MapSets compare accordingly
+    m_a, m_b = m_orig * 1.0, m_orig * 1.0
+    assert m_a == m_b and MapSet([m_a]) == MapSet([m_b])
+    m_a[0, 0, 0] = -5.5
+    assert m_a != m_b and MapSet([m_a]) != MapSet([m_b])
+    m_b[0, 0, 0] = -5.5
+    assert m_a == m_b and MapSet([m_a]) == MapSet([m_b])
+    state = m_a.hashable_state
+    m_a[0:2, :, :][0, 0, 0] = -6.5
+    assert m_a.hashable_state is not state
+    assert m_a != m_b
+    next(m_b.iterbins())[...] = -6.5
+    assert m_a == m_b
+
+    # Poisson errors are stored as a plain float array next to the values
+    m_err = m_orig * 1.0
+    m_err.set_poisson_errors()
+    assert m_err.nominal_values.dtype == np.float64
+    assert m_err.std_devs.dtype == np.float64
+    assert np.all(m_err.std_devs == np.sqrt(m_err.nominal_values))
+    assert m_err != m_orig * 1.0
+
+    # The arrays returned by `hist`, `nominal_values`, and `std_devs` are
+    # read-only, with or without errors; item assignment on the map is the
+    # way to modify it
+    m_noerr = m_orig * 1.0
+    for mp in [m_noerr, m_err]:
+        for attr in ['hist', 'nominal_values', 'std_devs']:
+            try:
+                getattr(mp, attr)[0, 0, 0] = -2
+            except ValueError:
+                pass
+            else:
+                assert False, 'write via `%s` did not raise' % attr
+        mp[0, 0, 0] = -2
+        assert mp.nominal_values[0, 0, 0] == -2
+        assert mp.std_devs[0, 0, 0] == 0
+
+    # Maps constructed from these arrays own (writable) copies of them
+    m_copy = Map(name='copy', hist=m_noerr.nominal_values,
+                 error_hist=m_err.std_devs, binning=m_err.binning)
+    m_copy[0, 0, 0] = ufloat(-3, 1)
+    assert m_noerr.nominal_values[0, 0, 0] == -2
+    assert m_err.std_devs[0, 0, 0] == 0
+
+    # Reflected operators with a scalar left-hand operand
+    assert np.allclose((2 / m_orig[1:, 1:, 1:]).hist,
+                       2. / m_orig[1:, 1:, 1:].hist)
+    assert np.all((2 - m_orig).hist == 2 - m_orig.hist)
+
+    # Full comparisons: exact, within precision, and differing metadata
+    m_cmp = m_orig * 1.0
+    assert m_cmp == m_cmp
+    assert m_cmp == m_orig
+    assert m_cmp == m_orig * (1 + 1e-15)
+    assert m_cmp != m_orig * 1.1
+    m_cmp.name = 'cmp'
+    assert m_cmp != m_orig
+
+    # Bins are iterated in C order, with views into the parent map
+    for idx, bin_map in izip(m_orig.iterindices(), m_orig.iterbins()):
+        assert bin_map.parent_indexer == m_orig.binning.coord(*idx)
+        assert bin_map.hist[0, 0, 0] == m_orig.hist[idx]
+    assert len(list(m_orig.iterindices())) == m_orig.size
+
+    # Maps are only hashable with an explicit hash (equality is tolerance
+    # based, so the byte-exact `content_hash` can not serve as `__hash__`)
+    m_hash = m_orig * 1.0
+    try:
+        hash(m_hash)
+    except ValueError:
+        pass
+    else:
+        assert False, 'map without explicit hash is hashable'
+    assert m_hash.content_hash == (m_orig * 1.0).content_hash
+
+    # The (cached) content hash follows every supported in-place modification
+    # and matches that of an identically modified map
+    m_ref = m_orig * 1.0
+    modifications = [
+        lambda mp: mp.set_poisson_errors(),
+        lambda mp: mp.set_errors(np.ones(mp.shape)),
+        lambda mp: mp.__setitem__((0, 1, 0), ufloat(3, 2)),
+        lambda mp: mp.set_errors(None),
+        lambda mp: mp.__setitem__((0, 0, 0), -1),
+        lambda mp: mp[1:, :, :].__setitem__((0, 0, 0), -1),
+        lambda mp: next(mp.iterbins()).__setitem__(Ellipsis, -2),
+    ]
+    for modify in modifications:
+        old_content_hash = m_hash.content_hash
+        modify(m_hash)
+        modify(m_ref)
+        assert m_hash.content_hash != old_content_hash
+        assert m_hash.content_hash == m_ref.content_hash
+    m_hash.hash = 5
+    assert hash(m_hash) == 5
+
+    # Only slots (and properties with setters) can be set
+    try:
+        m_hash.foo = 1
+    except AttributeError:
+        pass
+    else:
+        assert False, 'Setting undefined attribute should fail'
+    assert not hasattr(m_hash, '__dict__')
+
+    # Fused evaluation of an expression matches chained arithmetic
+    m_a = m_orig * 1.0
+    m_b = m_orig + 2.0
+    m_eval = Map.evaluate('a * (b + c) - b/2', a=m_a, b=m_b, c=3.0)
+    assert np.allclose(m_eval.hist, (m_a * (m_b + 3.0) - m_b/2).hist)
+    assert m_eval.binning == m_a.binning
+
+    # The numpy fallback (used if numexpr is not installed) supports the same
+    # syntax, but nothing beyond it
+    arrs = dict(a=m_a.nominal_values, b=m_b.nominal_values, c=3.0)
+    for expr, ref in [
+            ('a * (b + c) - b/2', arrs['a'] * (arrs['b'] + 3.0) - arrs['b']/2),
+            ('-a**2 % 3', -arrs['a']**2 % 3),
+            ('where(a > b, exp(-a), sqrt(b))',
+             np.where(arrs['a'] > arrs['b'], np.exp(-arrs['a']),
+                      np.sqrt(arrs['b'])))]:
+        result = _evaluate_expr(ast.parse(expr, mode='eval'), arrs)
+        assert np.allclose(result, ref, equal_nan=True), expr
+    for expr, err in [('a.__class__', ValueError), ('open(a)', ValueError),
+                      ('[a, b]', ValueError), ('d + a', NameError)]:
+        try:
+            _evaluate_expr(ast.parse(expr, mode='eval'), arrs)
+        except err:
+            pass
+        else:
+            assert False, 'expression "%s" should not be evaluated' % expr
+
+    # Single-precision maps stay single precision through arithmetic
+    m_f32 = Map(name='f32', hist=m_orig.hist, binning=m_orig.binning,
+                dtype=np.float32)
+    m_f32.set_poisson_errors()
+    for result in [m_f32 + m_f32, m_f32 * 2, m_f32 / m_f32.sqrt(),
+                   m_f32.sum(axis=0), m_f32[0:2, 1, :]]:
+        assert result.nominal_values.dtype == np.float32
+        assert result.std_devs.dtype == np.float32
+    assert np.isclose(m_f32.llh(m_f32 + 1), (m_orig * 1.0).llh(m_orig + 1.0))
+
+    # Totals from the compiled kernels match the sums of the binned values
+    m_exp = m_orig * 1.0
+    m_data = m_exp.fluctuate('poisson', random_state=0)
+    m_data[0, 0, 0] = 0
+    m_data.set_poisson_errors()
+    assert np.isclose(m_data.llh(m_exp),
+                      np.sum(m_data.llh(m_exp, binned=True)))
+    assert np.isclose(m_data.chi2(m_exp),
+                      np.sum(m_data.chi2(m_exp, binned=True)))
+    assert m_exp.chi2(m_exp) == 0
+    m_neg = m_exp * 1.0
+    m_neg[0, 0, 0] = -1
+    for metric in ['llh', 'chi2']:
+        try:
+            getattr(m_neg, metric)(m_exp)
+        except ValueError:
+            pass
+        else:
+            assert False, 'negative values accepted by %s' % metric
+
     deepcopy(m_orig)
 
     logging.info(str(('<< PASS : test_Map >>')))
@@ -2953,7 +3737,9 @@ def test_MapSet():
     _ = ms01.rebin(m1.binning.downsample(3))
     ms01_rebinned = ms01.rebin(m1.binning.downsample(6, 3))
     for m_orig, m_rebinned in zip(ms01, ms01_rebinned):
-        assert m_rebinned.hist[0, 0] == np.sum(m_orig.hist)
+        assert m_rebinned.nominal_values[0, 0] == np.sum(m_orig.nominal_values)
+        assert np.isclose(m_rebinned.std_devs[0, 0],
+                          np.sqrt(np.sum(np.square(m_orig.std_devs))))
 
     logging.debug(str(("downsampling =====================")))
     logging.debug(str((ms01.downsample(3))))
@@ -2962,12 +3748,15 @@ def test_MapSet():
     ms02 = MapSet((m1, m2), name='map set 1')
     ms1 = MapSet(maps=(m1, m2), name='map set 1', collate_by_name=True,
                  hash=None)
-    assert np.all(ms1.combine_re(r'.*').hist == ms1.combine_wildcard('*').hist)
-    assert np.all(ms1.combine_re(r'.*').hist == (ms1.ones + ms1.twos).hist)
-    assert np.all(ms1.combine_re(r'^(one|two)s.*$').hist ==
-                  ms1.combine_wildcard('*s').hist)
-    assert np.all(ms1.combine_re(r'^(one|two)s.*$').hist == (ms1.ones +
-                                                             ms1.twos).hist)
+    # Note that `hist` contains independent `uncertainties` variables each
+    # time it is accessed, so compare values and errors separately
+    for a, b in [(ms1.combine_re(r'.*'), ms1.combine_wildcard('*')),
+                 (ms1.combine_re(r'.*'), ms1.ones + ms1.twos),
+                 (ms1.combine_re(r'^(one|two)s.*$'),
+                  ms1.combine_wildcard('*s')),
+                 (ms1.combine_re(r'^(one|two)s.*$'), ms1.ones + ms1.twos)]:
+        assert np.all(a.nominal_values == b.nominal_values)
+        assert np.all(a.std_devs == b.std_devs)
     logging.debug(str((ms1.combine_re(r'^o').hist)))
     logging.debug(str((ms1.combine_wildcard(r'o*').hist)))
     logging.debug(str((ms1.combine_re(r'^o').hist
@@ -3018,9 +3807,65 @@ def test_MapSet():
     m1.hash = 40
     # ... so a hash should be computed from all contained hashes
     assert ms1.hash != 40 and ms1.hash != -10
+    assert ms1.hash_maps() == hash_obj([40, -10])
+    assert ms1.hash_maps(['twos']) == hash_obj([-10])
 
     assert ms1.maps == [m1, m2]
     assert ms1.names == ['ones', 'twos']
+    # Cached names follow renaming and removal of contained maps
+    m2.name = 'threes'
+    assert ms1.names == ['ones', 'threes'] and 'threes' in ms1
+    m2.name = 'twos'
+    assert 'threes' not in ms1 and ms1.twos is m2
+    ms_tmp = MapSet([m1, m2])
+    ms_tmp.pop()
+    assert ms_tmp.names == ['ones'] and 'twos' not in ms_tmp
+    # ... as well as modification or replacement of the list of maps
+    ms_tmp.maps.append(m2)
+    assert ms_tmp.names == ['ones', 'twos'] and ms_tmp.twos is m2
+    ms_tmp.maps[0] = m2 * 3
+    assert ms_tmp.names == ['twos', 'twos']
+    del ms_tmp.maps[:]
+    assert ms_tmp.names == []
+    ms_tmp.maps = [m2, m1]
+    assert ms_tmp.names == ['twos', 'ones'] and ms_tmp.ones is m1
+
+    # Equality is decided by names and hashes when all maps have hashes, and
+    # by the full states of the maps otherwise
+    assert ms1 == ms1 and MapSet([m1, m2]) == ms1
+    m_tmp = m2 * 2
+    m_tmp.hash = None
+    assert not MapSet([m1, m_tmp]) == ms1
+    m_tmp = m2 * 1
+    m_tmp.hash = None
+    assert MapSet([m1, m_tmp]) == ms1
+
+    # Totals of metrics over the set match the sums of the per-map values
+    ms_exp = ms1 * 1.5
+    for metric in ['chi2', 'llh', 'mod_chi2']:
+        per_map = ms1.metric_per_map(ms_exp, metric)
+        assert np.isclose(ms1.metric_total(ms_exp, metric),
+                          np.sum(per_map.values()))
+    assert np.isclose(ms1.llh_total(ms_exp),
+                      np.sum(ms1.llh_per_map(ms_exp).values()))
+    assert np.isclose(ms1.chi2_total(ms_exp),
+                      np.sum(ms1.chi2_per_map(ms_exp).values()))
+    # Scalar arithmetic on maps without errors operates on the stacked values
+    ms_noerr = MapSet([Map(name='a', hist=np.arange(18.).reshape(6, 3) + 1,
+                           binning=binning, hash='abc'),
+                       Map(name='b', hist=2*np.ones(binning.shape),
+                           binning=binning)])
+    for ms_new, func in [(ms_noerr * 2, lambda m: m * 2),
+                         (3 - ms_noerr, lambda m: 3 - m),
+                         (1. / ms_noerr, lambda m: 1. / m),
+                         (ms_noerr ** 2, lambda m: m ** 2)]:
+        for mp, mp_new in izip(ms_noerr, ms_new):
+            expected = func(mp)
+            assert np.all(mp_new.nominal_values == expected.nominal_values)
+            assert mp_new.name == mp.name and mp_new.hash == mp.hash
+            assert mp_new.binning == mp.binning
+    assert ms_noerr.a.nominal_values[0, 0] == 1
+
     assert ms1.tex is None
     # Check the Poisson errors
     assert np.all(ms1[0].nominal_values == np.ones(binning.shape))
@@ -16,7 +16,7 @@ from numba import guvectorize, SmartArray, cuda
 
 from pisa import FTYPE, TARGET
 from pisa.core.binning import OneDimBinning, MultiDimBinning
-from pisa.utils.numba_tools import myjit, WHERE
+from pisa.utils.numba_tools import myjit, WHERE, ftype
 from pisa.utils import vectorizer
 
 __all__ = [
@@ -193,10 +193,62 @@ def get_hist_np(sample, weights, binning, apply_weights=True):
     return SmartArray(flat_hist.astype(FTYPE))
 
 # TODO: can we do just n-dimensional? And scalars or arbitrary array shapes? This is so ugly :/
-# Furthermore: optimize using shared memory
+
+# Histograms with up to this many bins are accumulated per thread block in
+# shared memory first (shared arrays need a size known at compile time), and
+# only added to the global histogram once per block and bin
+SHARED_HIST_SIZE = 1024
+
+@cuda.jit(device=True)
+def init_shared_hist(shared_hist, size):
+    '''Zero the first `size` bins of a block's shared histogram'''
+    for j in range(cuda.threadIdx.x, size, cuda.blockDim.x):
+        shared_hist[j] = 0.
+    cuda.syncthreads()
+
+@cuda.jit(device=True)
+def flush_shared_hist(shared_hist, flat_hist):
+    '''Add a block's shared histogram to the global one'''
+    cuda.syncthreads()
+    for j in range(cuda.threadIdx.x, flat_hist.size, cuda.blockDim.x):
+        if shared_hist[j] != 0.:
+            cuda.atomic.add(flat_hist, j, shared_hist[j])
+
+@cuda.jit(device=True)
+def warp_sum_by_index(idx, value):
+    '''Sum `value` over all lanes of the warp that share the same `idx`
+
+    Only the lowest of those lanes is flagged to do the atomic add, so
+    samples falling into the same bin cost one atomic per warp instead of
+    one per thread. All lanes of the warp must call this (use idx = -1 for
+    lanes without anything to add).
+
+    Returns
+    -------
+    total : sum of `value` over the lanes with the same `idx`
+    first : True for the lowest lane with that `idx`
+    '''
+    lane = cuda.laneid
+    total = 0.
+    first = True
+    for src in range(32):
+        src_idx = cuda.shfl_sync(0xffffffff, idx, src)
+        src_value = cuda.shfl_sync(0xffffffff, value, src)
+        if src_idx == idx:
+            total += src_value
+            if src < lane:
+                first = False
+    return total, first
+
 @cuda.jit
 def histogram_2d_kernel(sample_x, sample_y, flat_hist, bin_edges_x, bin_edges_y, weights, apply_weights):
+    shared_hist = cuda.shared.array(SHARED_HIST_SIZE, dtype=ftype)
+    use_shared = flat_hist.size <= SHARED_HIST_SIZE
+    if use_shared:
+        init_shared_hist(shared_hist, flat_hist.size)
     i = cuda.grid(1)
+    idx = -1
+    value = 0.
     if i < sample_x.size:
         if (sample_x[i] >= bin_edges_x[0]
                 and sample_x[i] <= bin_edges_x[-1]
@@ -206,13 +258,22 @@ def histogram_2d_kernel(sample_x, sample_y, flat_hist, bin_edges_x, bin_edges_y,
             idx_y = find_index(sample_y[i], bin_edges_y)
             idx = idx_x * (bin_edges_y.size - 1) + idx_y
             if apply_weights:
-                cuda.atomic.add(flat_hist, idx, weights[i])
+                value = weights[i]
             else:
-                cuda.atomic.add(flat_hist, idx, 1.)
+                value = 1.
+    total, first = warp_sum_by_index(idx, value)
+    if first and idx >= 0:
+        if use_shared:
+            cuda.atomic.add(shared_hist, idx, total)
+        else:
+            cuda.atomic.add(flat_hist, idx, total)
+    if use_shared:
+        flush_shared_hist(shared_hist, flat_hist)
 
 @cuda.jit
 def histogram_2d_kernel_arrays(sample_x, sample_y, flat_hist, bin_edges_x, bin_edges_y, weights, apply_weights):
     i = cuda.grid(1)
+    idx = -1
     if i < sample_x.size:
         if (sample_x[i] >= bin_edges_x[0]
                 and sample_x[i] <= bin_edges_x[-1]
@@ -221,15 +282,26 @@ def histogram_2d_kernel_arrays(sample_x, sample_y, flat_hist, bin_edges_x, bin_e
             idx_x = find_index(sample_x[i], bin_edges_x)
             idx_y = find_index(sample_y[i], bin_edges_y)
             idx = idx_x * (bin_edges_y.size - 1) + idx_y
-            for j in range(flat_hist.shape[1]):
-                if apply_weights:
-                    cuda.atomic.add(flat_hist, (idx, j), weights[i, j])
-                else:
-                    cuda.atomic.add(flat_hist, (idx, j), 1.)
+    for j in range(flat_hist.shape[1]):
+        value = 0.
+        if idx >= 0:
+            if apply_weights:
+                value = weights[i, j]
+            else:
+                value = 1.
+        total, first = warp_sum_by_index(idx, value)
+        if first and idx >= 0:
+            cuda.atomic.add(flat_hist, (idx, j), total)
 
 @cuda.jit
 def histogram_3d_kernel(sample_x, sample_y, sample_z, flat_hist, bin_edges_x, bin_edges_y, bin_edges_z, weights, apply_weights):
+    shared_hist = cuda.shared.array(SHARED_HIST_SIZE, dtype=ftype)
+    use_shared = flat_hist.size <= SHARED_HIST_SIZE
+    if use_shared:
+        init_shared_hist(shared_hist, flat_hist.size)
     i = cuda.grid(1)
+    idx = -1
+    value = 0.
     if i < sample_x.size:
         if (sample_x[i] >= bin_edges_x[0]
                 and sample_x[i] <= bin_edges_x[-1]
@@ -242,13 +314,22 @@ def histogram_3d_kernel(sample_x, sample_y, sample_z, flat_hist, bin_edges_x, bi
             idx_z = find_index(sample_z[i], bin_edges_z)
             idx = idx_x * (bin_edges_y.size - 1) * (bin_edges_z.size - 1) + idx_y * (bin_edges_z.size - 1) + idx_z
             if apply_weights:
-                cuda.atomic.add(flat_hist, idx, weights[i])
+                value = weights[i]
             else:
-                cuda.atomic.add(flat_hist, idx, 1.)
+                value = 1.
+    total, first = warp_sum_by_index(idx, value)
+    if first and idx >= 0:
+        if use_shared:
+            cuda.atomic.add(shared_hist, idx, total)
+        else:
+            cuda.atomic.add(flat_hist, idx, total)
+    if use_shared:
+        flush_shared_hist(shared_hist, flat_hist)
 
 @cuda.jit
 def histogram_3d_kernel_arrays(sample_x, sample_y, sample_z, flat_hist, bin_edges_x, bin_edges_y, bin_edges_z, weights, apply_weights):
     i = cuda.grid(1)
+    idx = -1
     if i < sample_x.size:
         if (sample_x[i] >= bin_edges_x[0]
                 and sample_x[i] <= bin_edges_x[-1]
@@ -260,11 +341,16 @@ def histogram_3d_kernel_arrays(sample_x, sample_y, sample_z, flat_hist, bin_edge
             idx_y = find_index(sample_y[i], bin_edges_y)
             idx_z = find_index(sample_z[i], bin_edges_z)
             idx = idx_x * (bin_edges_y.size - 1) * (bin_edges_z.size - 1) + idx_y * (bin_edges_z.size - 1) + idx_z
-            for j in range(flat_hist.shape[1]):
-                if apply_weights:
-                    cuda.atomic.add(flat_hist, (idx, j), weights[i, j])
-                else:
-                    cuda.atomic.add(flat_hist, (idx, j), 1.)
+    for j in range(flat_hist.shape[1]):
+        value = 0.
+        if idx >= 0:
+            if apply_weights:
+                value = weights[i, j]
+            else:
+                value = 1.
+        total, first = warp_sum_by_index(idx, value)
+        if first and idx >= 0:
+            cuda.atomic.add(flat_hist, (idx, j), total)
 
 
 # ---------- Lookup methods ---------------
@@ -386,7 +386,7 @@ def compare(outdir, ref, ref_label, test, test_label, asymm_max=None,
     def zero_to_nan(map):
         newmap = deepcopy(map)
         mask = np.isclose(newmap.nominal_values, 0, rtol=0, atol=EPSILON)
-        newmap.hist[mask] = np.nan
+        newmap[mask] = np.nan
         return newmap
 
     reordered_test = []
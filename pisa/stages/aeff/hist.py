@@ -420,7 +420,7 @@ class hist(Stage):
             # volumes to convert from sums-of-OneWeights-in-bins to
             # effective areas. Note that volume correction factor for
             # missing dimensions is applied here.
-            aeff_transform /= norm_volumes
+            aeff_transform = aeff_transform / norm_volumes
 
             if self.debug_mode:
                 outfile = os.path.join(
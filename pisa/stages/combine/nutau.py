@@ -1,3 +1,5 @@
+import ast
+
 import numpy as np
 
 from pisa import ureg, Q_
@@ -32,8 +34,8 @@ class nutau(Stage):
     Stage combining the different maps (flav int) into right now a single map
     and apply a scale factor for nutau events
 
-    combine_groups: dict with output map names and what maps should be contained
-    for example
+    combine_groups: dict (or string repr of a dict literal) with output map
+    names and what maps should be contained, for example
       {
         'evts':
           'nue_cc, nuebar_cc, numu_cc, numubar_cc, nutau_cc, nutaubar_cc, nue_nc, nuebar_nc, numu_nc, numubar_nc, nutau_nc, nutaubar_nc'
@@ -60,9 +62,13 @@ class nutau(Stage):
         )
 
         #input_names = split(input_names, sep=',')
-        self.combine_groups = eval(combine_groups)
-        for key, val in self.combine_groups.items():
-            self.combine_groups[key] = split(val, sep=',')
+        if isinstance(combine_groups, basestring):
+            combine_groups = ast.literal_eval(combine_groups)
+        self.combine_groups = {}
+        for key, val in combine_groups.items():
+            if isinstance(val, basestring):
+                val = split(val, sep=',')
+            self.combine_groups[key] = list(val)
         output_names = self.combine_groups.keys()
 
         super(self.__class__, self).__init__(
@@ -80,26 +86,43 @@ class nutau(Stage):
             debug_mode=debug_mode
         )
 
+        # Per group: output name, input names, which of the inputs are scaled
+        # by `nu_nc_norm`, and the transform's shape. None of these change, so
+        # only the scale values are recomputed per call
+        bin_shape = [self.input_binning[d].num_bins
+                     for d in self.input_binning.names]
+        self._group_info = [
+            (group, in_names,
+             np.array(['_nc' in n for n in in_names], dtype=bool),
+             tuple([len(in_names)] + bin_shape))
+            for group, in_names in self.combine_groups.items()
+        ]
+
+        # All-ones transform arrays for the groups for which the transform is
+        # the identity at nominal `nu_nc_norm` (or at any `nu_nc_norm`, if a
+        # group has no NC inputs), allocated only once; see
+        # `_compute_transforms`
+        self._identity_xforms = {}
+
     @profile
     def _compute_transforms(self):
-        dims = self.input_binning.names
+        nu_nc_norm = self.params.nu_nc_norm.value.m_as(ureg.dimensionless)
 
         transforms = []
-        for group, in_names in self.combine_groups.items():
-            xform_shape = [len(in_names)] + [self.input_binning[d].num_bins for d in dims]
-
-            xform = np.ones(xform_shape)
-            input_names = self.input_names
-            for i,name in enumerate(in_names):
-                scale = 1.
-                if '_nc' in name:
-                    scale *= self.params.nu_nc_norm.value.m_as('dimensionless')
-                #if 'nutau' in name:
-                #    scale *= self.params.nutau_norm.value.m_as('dimensionless')
-                #if name in ['nutau_cc','nutaubar_cc']:
-                #    scale *= self.params.nutau_cc_norm.value.m_as('dimensionless')
-                if scale != 1:
-                    xform[i] *= scale
+        for group, in_names, nc_mask, xform_shape in self._group_info:
+            if nu_nc_norm == 1 or not nc_mask.any():
+                # Transforms' arithmetic never modifies the arrays in place,
+                # so the identity array can be shared between transforms
+                if group not in self._identity_xforms:
+                    self._identity_xforms[group] = np.ones(xform_shape)
+                xform = self._identity_xforms[group]
+            else:
+                # One scale factor per input map, uniform over all its bins
+                scales = np.where(nc_mask, nu_nc_norm, 1.0)
+                xform = np.empty(xform_shape)
+                xform[...] = scales.reshape(
+                    (-1,) + (1,)*(len(xform_shape) - 1)
+                )
 
             transforms.append(
                 BinnedTensorTransform(
@@ -20,7 +20,7 @@ from pisa.utils.log import logging
 from pisa.utils.profiler import profile
 from pisa.stages.osc.pi_osc_params import OscParams
 from pisa.stages.osc.layers import Layers
-from pisa.stages.osc.prob3numba.numba_osc import propagate_array, fill_probs
+from pisa.stages.osc.prob3numba.numba_osc import propagate_array, fill_probs_e_mu
 from pisa.utils.numba_tools import WHERE
 from pisa.utils.resources import find_resource
 from pisa import ureg
@@ -440,18 +440,12 @@ class decoherence(PiStage):
         self.data.unlink_containers()
 
         for container in self.data:
-            # initial electrons (0)
-            fill_probs(container['probability'].get(WHERE),
-                       0, # electron
-                       container['flav'],
-                       out=container['prob_e'].get(WHERE),
-                      )
-            # initial muons (1)
-            fill_probs(container['probability'].get(WHERE),
-                       1, # muon
-                       container['flav'],
-                       out=container['prob_mu'].get(WHERE),
-                      )
+            # initial electrons (0) and muons (1)
+            fill_probs_e_mu(container['probability'].get(WHERE),
+                            container['flav'],
+                            container['prob_e'].get(WHERE),
+                            container['prob_mu'].get(WHERE),
+                           )
 
             container['prob_e'].mark_changed(WHERE)
             container['prob_mu'].mark_changed(WHERE)
@@ -16,7 +16,7 @@ from pisa.utils.fileio import from_file
 from pisa.utils.log import logging, set_verbosity
 
 
-__all__ = ['extCalcLayers', 'Layers']
+__all__ = ['extCalcLayers', 'extCalcPathLength', 'Layers']
 
 __author__ = 'P. Eller'
 
@@ -92,14 +92,20 @@ def extCalcLayers(
     distance = np.zeros(shape=shape, dtype=FTYPE)
     density = np.zeros(shape=shape, dtype=FTYPE)
 
+    # Scratch arrays for the densities and electron fractions along one path;
+    # allocated once and reset for every CZ value
+    traverse_rhos = np.zeros(max_layers, dtype=FTYPE)
+    traverse_electron_frac = np.zeros(max_layers, dtype=FTYPE)
+
     # Loop over all CZ values
     for k, coszen in enumerate(cz):
         tot_earth_len = -2 * coszen * r_detector
 
-        # To store results
-        traverse_rhos = np.zeros(max_layers, dtype=FTYPE)
-        traverse_dist = np.zeros(max_layers, dtype=FTYPE)
-        traverse_electron_frac = np.zeros(max_layers, dtype=FTYPE)
+        # To store results; distances are written straight into their
+        # (contiguous) row of the output
+        traverse_rhos[:] = 0.
+        traverse_electron_frac[:] = 0.
+        traverse_dist = distance[k]
 
         # Above horizon
         if coszen >= 0:
@@ -207,12 +213,47 @@ def extCalcLayers(
             layers = 2 * layers + i_trav - 1
 
         n_layers[k] = np.int32(layers)
-        density[k] = traverse_rhos * traverse_electron_frac
-        distance[k] = traverse_dist
+        for i in range(max_layers):
+            density[k, i] = traverse_rhos[i] * traverse_electron_frac[i]
 
     return n_layers, density.ravel(), distance.ravel()
 
 
+@jit(nopython=True, nogil=True, cache=True)
+def extCalcPathLength(cz, r_detector, prop_height, detector_depth):
+    """Path length through an Earth-sized sphere for each coszen specified.
+
+    Accelerated with Numba if present.
+
+    Parameters
+    ----------
+    cz
+    r_detector
+    prop_height
+    detector_depth
+
+    Returns
+    -------
+    pathlength : array of path lengths, same length as `cz`
+
+    """
+    pathlength = np.zeros(len(cz), dtype=FTYPE)
+    for k, coszen in enumerate(cz):
+        if coszen < 0:
+            pathlength[k] = np.sqrt(
+                (r_detector + prop_height + detector_depth) *
+                (r_detector + prop_height + detector_depth) -
+                (r_detector*r_detector)*(1 - coszen*coszen)
+            ) - r_detector*coszen
+        else:
+            kappa = (detector_depth + prop_height)/r_detector
+            pathlength[k] = r_detector * np.sqrt(
+                coszen*coszen - 1 + (1 + kappa)*(1 + kappa)
+            ) - r_detector*coszen
+
+    return pathlength
+
+
 class Layers(object):
     """
     Calculate the path through earth for a given layer model with densities
@@ -370,25 +411,13 @@ class Layers(object):
         cz : cos(zenith angle), either single float value or an array of float values
 
         """
-        pathlength = []
-
-        for this_cz in (cz if hasattr(cz,"__len__") else [cz] ) :
-
-            if this_cz < 0:
-                this_pathlength = np.sqrt(
-                    (self.r_detector + self.prop_height + self.detector_depth) * \
-                    (self.r_detector + self.prop_height + self.detector_depth) - \
-                    (self.r_detector*self.r_detector)*(1 - this_cz*this_cz)
-                ) - self.r_detector*this_cz
-            else:
-                kappa = (self.detector_depth + self.prop_height)/self.r_detector
-                this_pathlength = self.r_detector * np.sqrt(
-                    this_cz*this_cz - 1 + (1 + kappa)*(1 + kappa)
-                ) - self.r_detector*this_cz
-
-            pathlength.append(this_pathlength)
-
-        pathlength = np.asarray(pathlength)
+        # run external function
+        pathlength = extCalcPathLength(
+            cz=np.atleast_1d(cz),
+            r_detector=self.r_detector,
+            prop_height=self.prop_height,
+            detector_depth=self.detector_depth
+        )
 
         self._distance = pathlength
 
@@ -245,7 +245,8 @@ class OscParams(object):
     @property
     def mix_matrix_complex(self):
         ''' mixing matrix as complex 2-d array'''
-        return self.mix_matrix[:, :, 0] + self.mix_matrix[:, :, 1] * 1.j
+        mix = self.mix_matrix
+        return mix[:, :, 0] + mix[:, :, 1] * 1.j
 
     @property
     def dm_matrix(self):
@@ -16,8 +16,8 @@ from pisa.utils.log import logging
 from pisa.utils.profiler import profile
 from pisa.stages.osc.pi_osc_params import OscParams
 from pisa.stages.osc.layers import Layers
-from pisa.stages.osc.prob3numba.numba_osc import propagate_array, fill_probs
-from pisa.utils.numba_tools import WHERE
+from pisa.stages.osc.prob3numba.numba_osc import MAX_LAYERS, propagate_array, fill_probs_e_mu
+from pisa.utils.numba_tools import WHERE, cuda
 from pisa.utils.resources import find_resource
 
 
@@ -44,6 +44,12 @@ class pi_prob3(PiStage):
 
     Notes
     -----
+    The floating point precision is not a stage option; it is set for all of
+    PISA via the `PISA_FTYPE` environment variable (see `pisa.FTYPE`), as the
+    kernels are compiled for that type at import time. In single precision,
+    the inputs, outputs and layer arrays are FP32 while intermediate results
+    that involve double precision constants are promoted to FP64, and the
+    probabilities agree with the FP64 ones to ~1e-5.
 
     """
     def __init__(self,
@@ -106,28 +112,67 @@ class pi_prob3(PiStage):
         assert self.output_mode is not None
 
         self.layers = None
+        # electron fractions the current layers were calculated with
+        self.layers_elec_frac = None
         self.osc_params = None
+        # mixing parameters the current matrices were built with
+        self.osc_params_values = None
+        # oscillation matrices shared by all containers, see `calc_matrices`
+        self.dm_matrix = None
+        self.mix_matrix = None
+        self.nsi_eps = None
 
     def setup_function(self):
 
         # object for oscillation parameters
         self.osc_params = OscParams()
+        self.osc_params_values = None
 
         # setup the layers
         #if self.params.earth_model.value is not None:
         earth_model = find_resource(self.params.earth_model.value)
-        YeI = self.params.YeI.value.m_as('dimensionless')
-        YeO = self.params.YeO.value.m_as('dimensionless')
-        YeM = self.params.YeM.value.m_as('dimensionless')
         prop_height = self.params.prop_height.value.m_as('km')
         detector_depth = self.params.detector_depth.value.m_as('km')
         self.layers = Layers(earth_model, detector_depth, prop_height)
-        self.layers.setElecFrac(YeI, YeO, YeM)
+        if self.layers.max_layers > MAX_LAYERS:
+            # the kernel has no bounds checks, so this would silently overflow
+            raise ValueError('Earth model "%s" needs %i layers, but the'
+                             ' oscillation kernel supports at most %i'
+                             %(earth_model, self.layers.max_layers, MAX_LAYERS))
 
         # set the correct data mode
         self.data.data_specs = self.calc_specs
 
         # --- calculate the layers ---
+        self.layers_elec_frac = None
+        self.calc_layers()
+
+        # --- setup empty arrays ---
+        if self.calc_mode == 'binned':
+            self.data.link_containers('nu', ['nue_cc', 'numu_cc', 'nutau_cc',
+                                             'nue_nc', 'numu_nc', 'nutau_nc'])
+            self.data.link_containers('nubar', ['nuebar_cc', 'numubar_cc', 'nutaubar_cc',
+                                                'nuebar_nc', 'numubar_nc', 'nutaubar_nc'])
+        for container in self.data:
+            container['probability'] = np.empty((container.size, 3, 3), dtype=FTYPE)
+        self.data.unlink_containers()
+
+        # setup more empty arrays
+        for container in self.data:
+            container['prob_e'] = np.empty((container.size), dtype=FTYPE)
+            container['prob_mu'] = np.empty((container.size), dtype=FTYPE)
+
+    def calc_layers(self):
+        ''' calculate densities and distances of the layers traversed, unless
+        the electron fractions are unchanged since the last calculation (the
+        geometry does not depend on the oscillation parameters) '''
+        elec_frac = (self.params.YeI.value.m_as('dimensionless'),
+                     self.params.YeO.value.m_as('dimensionless'),
+                     self.params.YeM.value.m_as('dimensionless'))
+        if elec_frac == self.layers_elec_frac:
+            return
+        self.layers.setElecFrac(*elec_frac)
+
         if self.calc_mode == 'binned':
             # speed up calculation by adding links
             # as layers don't care about flavour
@@ -144,26 +189,46 @@ class pi_prob3(PiStage):
         # don't forget to un-link everything again
         self.data.unlink_containers()
 
-        # --- setup empty arrays ---
-        if self.calc_mode == 'binned':
-            self.data.link_containers('nu', ['nue_cc', 'numu_cc', 'nutau_cc',
-                                             'nue_nc', 'numu_nc', 'nutau_nc'])
-            self.data.link_containers('nubar', ['nuebar_cc', 'numubar_cc', 'nutaubar_cc',
-                                                'nuebar_nc', 'numubar_nc', 'nutaubar_nc'])
-        for container in self.data:
-            container['probability'] = np.empty((container.size, 3, 3), dtype=FTYPE)
-        self.data.unlink_containers()
-
-        # setup more empty arrays
-        for container in self.data:
-            container['prob_e'] = np.empty((container.size), dtype=FTYPE)
-            container['prob_mu'] = np.empty((container.size), dtype=FTYPE)
+        self.layers_elec_frac = elec_frac
+
+    def calc_matrices(self):
+        ''' build the mass splitting, mixing and NSI matrices (shared by all
+        containers), unless the mixing parameters are unchanged since the last
+        call, e.g. when only nuisance parameters move during a fit '''
+        values = (self.params.theta12.value.m_as('rad'),
+                  self.params.theta13.value.m_as('rad'),
+                  self.params.theta23.value.m_as('rad'),
+                  self.params.deltam21.value.m_as('eV**2'),
+                  self.params.deltam31.value.m_as('eV**2'),
+                  self.params.deltacp.value.m_as('rad'))
+        if values == self.osc_params_values:
+            return
+        theta12, theta13, theta23, dm21, dm31, deltacp = values
+        self.osc_params.theta12 = theta12
+        self.osc_params.theta13 = theta13
+        self.osc_params.theta23 = theta23
+        self.osc_params.dm21 = dm21
+        self.osc_params.dm31 = dm31
+        self.osc_params.deltacp = deltacp
+
+        # the matrices are the same for all containers, so only build them once
+        self.dm_matrix = self.osc_params.dm_matrix
+        self.mix_matrix = self.osc_params.mix_matrix_complex
+        self.nsi_eps = self.osc_params.nsi_eps
+        if TARGET == 'cuda':
+            # ...and only copy them to the device once (instead of implicitly
+            # with each kernel launch)
+            self.dm_matrix = cuda.to_device(self.dm_matrix)
+            self.mix_matrix = cuda.to_device(self.mix_matrix)
+            self.nsi_eps = cuda.to_device(self.nsi_eps)
+
+        self.osc_params_values = values
 
     def calc_probs(self, nubar, e_array, rho_array, len_array, out):
         ''' wrapper to execute osc. calc '''
-        propagate_array(self.osc_params.dm_matrix, # pylint: disable = unexpected-keyword-arg, no-value-for-parameter
-                        self.osc_params.mix_matrix_complex,
-                        self.osc_params.nsi_eps,
+        propagate_array(self.dm_matrix, # pylint: disable = unexpected-keyword-arg, no-value-for-parameter
+                        self.mix_matrix,
+                        self.nsi_eps,
                         nubar,
                         e_array.get(WHERE),
                         rho_array.get(WHERE),
@@ -178,6 +243,9 @@ class pi_prob3(PiStage):
         # set the correct data mode
         self.data.data_specs = self.calc_specs
 
+        # only recalculated if the electron fractions changed
+        self.calc_layers()
+
         if self.calc_mode == 'binned':
             # speed up calculation by adding links
             self.data.link_containers('nu', ['nue_cc', 'numu_cc', 'nutau_cc',
@@ -185,14 +253,8 @@ class pi_prob3(PiStage):
             self.data.link_containers('nubar', ['nuebar_cc', 'numubar_cc', 'nutaubar_cc',
                                                 'nuebar_nc', 'numubar_nc', 'nutaubar_nc'])
 
-        # --- update mixing params ---
-        self.osc_params.theta12 = self.params.theta12.value.m_as('rad')
-        self.osc_params.theta13 = self.params.theta13.value.m_as('rad')
-        self.osc_params.theta23 = self.params.theta23.value.m_as('rad')
-        self.osc_params.dm21 = self.params.deltam21.value.m_as('eV**2')
-        self.osc_params.dm31 = self.params.deltam31.value.m_as('eV**2')
-        self.osc_params.deltacp = self.params.deltacp.value.m_as('rad')
-
+        # only rebuilt if the mixing parameters changed
+        self.calc_matrices()
 
         for container in self.data:
             self.calc_probs(container['nubar'],
@@ -206,18 +268,12 @@ class pi_prob3(PiStage):
         self.data.unlink_containers()
 
         for container in self.data:
-            # initial electrons (0)
-            fill_probs(container['probability'].get(WHERE),
-                       0,
-                       container['flav'],
-                       out=container['prob_e'].get(WHERE),
-                      )
-            # initial muons (1)
-            fill_probs(container['probability'].get(WHERE),
-                       1,
-                       container['flav'],
-                       out=container['prob_mu'].get(WHERE),
-                      )
+            # initial electrons (0) and muons (1)
+            fill_probs_e_mu(container['probability'].get(WHERE),
+                            container['flav'],
+                            container['prob_e'].get(WHERE),
+                            container['prob_mu'].get(WHERE),
+                           )
 
             container['prob_e'].mark_changed(WHERE)
             container['prob_mu'].mark_changed(WHERE)
@@ -11,6 +11,8 @@ __all__ = ['get_transition_matrix',
            'propagate_array',
            'propagate_array_vacuum',
            'fill_probs',
+           'fill_probs_e_mu',
+           'MAX_LAYERS',
           ]
 __version__ = '0.1'
 
@@ -21,6 +23,11 @@ from numba import jit, float64, complex64, int32, float32, complex128, guvectori
 from pisa import FTYPE, TARGET
 from pisa.utils.numba_tools import myjit, conjugate_transpose, conjugate, matrix_dot_matrix, matrix_dot_vector, clear_matrix, copy_matrix, cuda, ctype, ftype
 
+# Maximum number of layers `osc_probs_layers_kernel` can handle (59Layer PREM
+# traversed twice + atmosphere). Local arrays need a shape known at compile
+# time (the kernel is specialized on this value), so it can't be set at runtime
+MAX_LAYERS = 120
+
 @myjit
 def get_H_vac(mix_nubar, mix_nubar_conj_transp, dm_vac_vac, H_vac):
     ''' Calculate vacuum Hamiltonian in flavor basis for neutrino or antineutrino
@@ -550,15 +557,15 @@ def osc_probs_vacuum_kernel(dm,
     Notes
     -----
 
-    This is largely unvalidated so far
+    Uses the standard three-flavour expression
 
-    '''
+        P(a -> b) = delta_ab
+            - 4 sum_{i>j} Re(U*_ai U_bi U_aj U*_bj) sin^2(dm_ij L / 4E)
+            + 2 sum_{i>j} Im(U*_ai U_bi U_aj U*_bj) sin(dm_ij L / 2E),
 
-    # no need to conjugate mix matrix, as we anyway only need real part
-    # can this be right?
+    with U -> U* for antineutrinos
 
-    clear_matrix(osc_probs)
-    osc_probs_local = cuda.local.array(shape=(3,3), dtype=ftype)
+    '''
 
     # sum up length from all layers
     baseline = 0.
@@ -567,32 +574,22 @@ def osc_probs_vacuum_kernel(dm,
 
     # make more precise 20081003 rvw
     l_over_e = 1.26693281 * baseline / energy
-    s21 = math.sin(dm[1,0] * l_over_e)
-    s32 = math.sin(dm[2,0] * l_over_e)
-    s31 = math.sin((dm[2,1] + dm[3,2]) * l_over_e)
-
-    # does anybody understand this loop?
-    # ista = abs(*nutype) - 1
-    for ista in range(3):
-        for iend in range(2):
-            osc_probs_local[ista,iend] = ((mix[ista,0].real * mix[ista,1].real * s21)**2
-                                          + (mix[ista,1].real * mix[ista,2].real * s32)**2
-                                          + (mix[ista,2].real * mix[ista,0].real * s31)**2
-                                         )
-            if iend == ista:
-                osc_probs_local[ista,iend] = 1. - 4. * osc_probs_local[ista,iend]
-            else:
-                osc_probs_local[ista,iend] = - 4. * osc_probs_local[ista,iend]
-
-        osc_probs_local[ista,2] = 1. - osc_probs_local[ista,0] - osc_probs_local[ista,1]
 
-    # is this necessary?
-    if nubar > 0 :
-        copy_matrix(osc_probs_local, osc_probs)
-    else:
-        for i in range(3):
-            for j in range(3):
-                osc_probs[i,j] = osc_probs_local[j,i]
+    # dm[i,j] = m_i^2 - m_j^2, for i,j = 0,1,2 (note that the 3x3 array must
+    # not be indexed with 3, as there are no bounds checks in compiled code)
+    for a in range(3):
+        for b in range(3):
+            prob = 1. if a == b else 0.
+            for i in range(1, 3):
+                for j in range(i):
+                    w = (mix[a,i].conjugate() * mix[b,i]
+                         * mix[a,j] * mix[b,j].conjugate())
+                    # conjugating the mixing matrix conjugates the product
+                    w_imag = w.imag if nubar > 0 else -w.imag
+                    phase = dm[i,j] * l_over_e
+                    prob += (- 4. * w.real * math.sin(phase)**2
+                             + 2. * w_imag * math.sin(2. * phase))
+            osc_probs[a,b] = prob
 
 @myjit
 def osc_probs_layers_kernel(dm,
@@ -644,7 +641,7 @@ def osc_probs_layers_kernel(dm,
     -----
 
     !!! Right now, because of CUDA, the maximum number of layers
-    is hard coded and set to 120 (59Layer PREM + Atmosphere).
+    is hard coded and set to `MAX_LAYERS` (59Layer PREM + Atmosphere).
     This is used for cached layer computation, where earth layer, which
     are typically traversed twice (it's symmetric) are not recalculated
     but rather cached..
@@ -660,13 +657,6 @@ def osc_probs_layers_kernel(dm,
     tmp = cuda.local.array(shape=(3,3), dtype=ctype)
 
     clear_matrix(H_vac)
-    clear_matrix(osc_probs)
-
-    # 3-vector complex
-    raw_input_psi = cuda.local.array(shape=(3), dtype=ctype)
-    output_psi = cuda.local.array(shape=(3), dtype=ctype)
-
-    use_mass_eigenstates = False
 
     cache = True
     #cache = False
@@ -693,7 +683,7 @@ def osc_probs_layers_kernel(dm,
     if cache:
         # allocate array to store all the transition matrices
         # doesn't work in cuda...needs fixed shape
-        transition_matrices = cuda.local.array(shape=(120,3,3), dtype=ctype)
+        transition_matrices = cuda.local.array(shape=(MAX_LAYERS,3,3), dtype=ctype)
 
         # loop over layers
         for i in range(distance_in_layer.shape[0]):
@@ -701,11 +691,13 @@ def osc_probs_layers_kernel(dm,
             distance = distance_in_layer[i]
             if distance > 0.:
                 layer_matrix_index = -1
-                # chaeck if exists
+                # check if exists; any match will do (all matching layers
+                # hold the same matrix), so stop reading layers at the first
                 for j in range(i):
                     #if density_in_layer[j] == density and distance_in_layer[j] == distance:
                     if (abs(density_in_layer[j] - density) < 1e-5) and (abs(distance_in_layer[j] - distance) < 1e-5):
                         layer_matrix_index = j
+                        break
 
                 # use from cached
                 if layer_matrix_index >= 0:
@@ -739,20 +731,18 @@ def osc_probs_layers_kernel(dm,
                         else:
                             transition_matrix[j,k] = 1.
 
-        # now multiply them all
+        # now multiply them all; the result of each step goes into the other
+        # one of the two product buffers (swapped) instead of being copied back
         first_layer = True
         for i in range(distance_in_layer.shape[0]):
             distance = distance_in_layer[i]
             if distance > 0.:
-                for j in range(3):
-                    for k in range(3):
-                        transition_matrix[j,k] = transition_matrices[i,j,k]
                 if first_layer:
-                    copy_matrix(transition_matrix, transition_product)
+                    copy_matrix(transition_matrices[i], transition_product)
                     first_layer = False
                 else:
-                    matrix_dot_matrix(transition_matrix,transition_product, tmp)
-                    copy_matrix(tmp, transition_product)
+                    matrix_dot_matrix(transition_matrices[i], transition_product, tmp)
+                    transition_product, tmp = tmp, transition_product
 
     else:
         # non-cache loop
@@ -777,27 +767,20 @@ def osc_probs_layers_kernel(dm,
                     copy_matrix(transition_matrix, transition_product)
                     first_layer = False
                 else:
-                    matrix_dot_matrix(transition_matrix,transition_product, tmp)
-                    copy_matrix(tmp, transition_product)
+                    matrix_dot_matrix(transition_matrix, transition_product, tmp)
+                    transition_product, tmp = tmp, transition_product
 
     # convrt to flavour eigenstate basis
     matrix_dot_matrix(transition_product, mix_nubar_conj_transp, tmp)
     matrix_dot_matrix(mix_nubar, tmp, transition_product)
 
-    # loop on neutrino types, and compute probability for neutrino i:
+    # loop on neutrino types, and compute probability for neutrino i; as the
+    # initial state is the flavour eigenstate i, the final state is simply
+    # the i-th column of the transition matrix
     for i in range(3):
         for j in range(3):
-            raw_input_psi[j] = 0.
-
-        if use_mass_eigenstates:
-            convert_from_mass_eigenstate(i+1, mix_nubar, raw_input_psi)
-        else:
-            raw_input_psi[i] = 1.
-
-        matrix_dot_vector(transition_product, raw_input_psi, output_psi)
-        osc_probs[i][0] += output_psi[0].real**2 + output_psi[0].imag**2
-        osc_probs[i][1] += output_psi[1].real**2 + output_psi[1].imag**2
-        osc_probs[i][2] += output_psi[2].real**2 + output_psi[2].imag**2
+            osc_probs[i,j] = (transition_product[j,i].real**2
+                              + transition_product[j,i].imag**2)
 
 def test_osc_probs_layers_kernel():
     mix = np.ones(shape=(3,3), dtype=ctype)
@@ -826,13 +809,24 @@ if FTYPE == np.float64:
     signature = '(f8[:,:], c16[:,:], c16[:,:], i4, f8, f8[:], f8[:], f8[:,:])'
     signature_vac = '(f8[:,:], c16[:,:], i4, f8, f8[:], f8[:,:])'
     signature_fill = '(f8[:,:], i4, i4, f8[:])'
+    signature_fill_e_mu = '(f8[:,:], i4, f8[:], f8[:])'
 else:
     signature = '(f4[:,:], c8[:,:], c8[:,:], i4, f4, f4[:], f4[:], f4[:,:])'
     signature_vac = '(f4[:,:], c8[:,:], i4, f4, f4[:], f4[:,:])'
     signature_fill = '(f4[:,:], i4, i4, f4[:])'
+    signature_fill_e_mu = '(f4[:,:], i4, f4[:], f4[:])'
 
 @guvectorize([signature], '(a,b),(c,d),(e,f),(),(),(g),(h)->(a,b)', target=TARGET)
 def propagate_array(dm, mix, nsi_eps, nubar, energy, densities, distances, probability):
+    '''Oscillation probabilities for arrays of events, see
+    `osc_probs_layers_kernel`
+
+    Being a gufunc, all arguments broadcast against each other over their
+    leading (non-core) dimensions. Several sets of oscillation parameters can
+    hence be evaluated in a single call, e.g. with `dm` and `mix` of shape
+    (n_params, 1, 3, 3) and the event arrays of length n_events, the result
+    has shape (n_params, n_events, 3, 3)
+    '''
     osc_probs_layers_kernel(dm, mix, nsi_eps, nubar, energy, densities, distances, probability)
 
 @guvectorize([signature_vac], '(a,b),(c,d),(),(),(i)->(a,b)', target=TARGET)
@@ -843,6 +837,83 @@ def propagate_array_vacuum(dm, mix, nubar, energy, distances, probability):
 def fill_probs(probability, initial_flav, flav, out):
     out[0] = probability[initial_flav,flav]
 
+@guvectorize([signature_fill_e_mu], '(a,b),()->(),()', target=TARGET)
+def fill_probs_e_mu(probability, flav, prob_e, prob_mu):
+    '''Fill both the initial electron (0) and initial muon (1) probabilities
+    in one go, instead of two `fill_probs` calls'''
+    prob_e[0] = probability[0,flav]
+    prob_mu[0] = probability[1,flav]
+
+def test_propagate_array():
+    n_evts = 5
+    n_layers = 10
+    mix = np.eye(3, dtype=ctype)
+    nsi_eps = np.zeros(shape=(3,3), dtype=ctype)
+    energy = np.linspace(1, 10, n_evts, dtype=ftype)
+    densities = np.ones(shape=(n_evts, n_layers), dtype=ftype)
+    distances = np.ones(shape=(n_evts, n_layers), dtype=ftype)
+
+    # batch of two parameter sets vs. one call per set
+    dm = np.empty(shape=(2,1,3,3), dtype=ftype)
+    for i, dm31 in enumerate([2.5e-3, -2.4e-3]):
+        m_sq = np.array([0., 7.5e-5, dm31])
+        dm[i,0] = m_sq[:, None] - m_sq[None, :]
+    batch = propagate_array(dm, mix, nsi_eps, 1, energy, densities, distances)
+    assert batch.shape == (2, n_evts, 3, 3)
+    for i in range(2):
+        probs = propagate_array(dm[i,0], mix, nsi_eps, 1, energy, densities, distances)
+        assert np.array_equal(batch[i], probs)
+
+def test_propagate_array_vacuum():
+    '''Compare vacuum probabilities to the analytic three-flavour expression
+    and to `propagate_array` through zero matter density'''
+    from pisa.stages.osc.pi_osc_params import OscParams
+    params = OscParams()
+    params.theta12 = 0.5903
+    params.theta13 = 0.1503
+    params.theta23 = 0.7854
+    params.dm21 = 7.5e-5
+    params.dm31 = 2.5e-3
+    params.deltacp = 1.2
+    dm = params.dm_matrix
+    mix = params.mix_matrix_complex.astype(ctype)
+    nsi_eps = np.zeros(shape=(3,3), dtype=ctype)
+
+    n_evts = 20
+    n_layers = 4
+    energy = np.logspace(0, 2, n_evts).astype(ftype)
+    distances = np.full((n_evts, n_layers), 3000., dtype=ftype)
+    densities = np.zeros(shape=(n_evts, n_layers), dtype=ftype)
+
+    for nubar in [1, -1]:
+        probs = propagate_array_vacuum(dm, mix, nubar, energy, distances)
+        assert probs.shape == (n_evts, 3, 3)
+
+        # P(a -> b) = delta_ab
+        #   - 4 sum_{i>j} Re(U*_ai U_bi U_aj U*_bj) sin^2(dm_ij L / 4E)
+        #   + 2 sum_{i>j} Im(U*_ai U_bi U_aj U*_bj) sin(dm_ij L / 2E),
+        # with U -> U* for antineutrinos
+        u = mix if nubar > 0 else mix.conj()
+        # w[a,b,i,j] = U*_ai U_bi U_aj U*_bj
+        w = np.einsum('ai,bi,aj,bj->abij', u.conj(), u, u, u.conj())
+        lower = np.tril(np.ones((3,3)), -1)
+        for k in range(n_evts):
+            arg = 1.26693281 * dm * distances[k].sum() / energy[k]
+            ref = (np.eye(3)
+                   - 4 * np.sum(lower * w.real * np.sin(arg)**2, axis=(2,3))
+                   + 2 * np.sum(lower * w.imag * np.sin(2*arg), axis=(2,3)))
+            assert np.allclose(probs[k], ref, rtol=0, atol=1e-6), \
+                    '%s\n%s' % (probs[k], ref)
+        assert np.allclose(probs.sum(axis=2), 1, rtol=0, atol=1e-6)
+
+        # The matter calculation uses a less precise L/E factor (2.534 / 2
+        # rather than 1.26693281), which shifts the phase by a few mrad at
+        # the lowest energy over this baseline
+        matter = propagate_array(dm, mix, nsi_eps, nubar, energy, densities,
+                                 distances)
+        assert np.allclose(probs, matter, rtol=0, atol=2e-3), \
+                np.max(np.abs(probs - matter))
+
 
 if __name__=='__main__':
 
@@ -855,3 +926,5 @@ if __name__=='__main__':
     test_convert_from_mass_eigenstate()
     test_get_transition_matrix()
     test_osc_probs_layers_kernel()
+    test_propagate_array()
+    test_propagate_array_vacuum()
@@ -16,16 +16,17 @@ then returned.
 
 from __future__ import absolute_import, division
 
+from ast import literal_eval
 from collections import OrderedDict
 from itertools import product
 
-import numpy as np
-
 from pisa.core.stage import Stage
 from pisa.core.transform import BinnedTensorTransform, TransformSet
 from pisa.core.events import Events
 from pisa.utils.flavInt import flavintGroupsFromString, NuFlavIntGroup
 from pisa.utils.log import logging
+from pisa.utils.pid_hist import (PID_EVENTS_JOINED_GROUPS,
+                                  pid_transform_arrays)
 from pisa.utils.profiler import profile
 
 
@@ -74,8 +75,8 @@ class hist(Stage):
                     "[('cscd', 'pid <= 0.55'), ('trck', 'pid > 0.55')]"
                 This is parsed out into a Python sequence of tuples, where
                 the first element of the tuple is identifies the signature and
-                the second is the string criteria to pass to the
-                Events.applyCut method.
+                the second is the string criteria selecting its events, in the
+                same form as accepted by the Events.applyCut method.
 
             * pid_weights_name: str or NoneType
                 Specify the name of the node whose data will be used as weights
@@ -292,84 +293,39 @@ class hist(Stage):
         # TODO: take events object as an input instead of as a param that
         # specifies a file? Or handle both cases?
 
-        pid_spec = OrderedDict(eval(self.params.pid_spec.value))
+        pid_spec = OrderedDict(literal_eval(self.params.pid_spec.value))
         if set(pid_spec.keys()) != set(self.output_channels):
             msg = 'PID criteria from `pid_spec` {0} does not match {1}'
             raise ValueError(msg.format(pid_spec.keys(), self.output_channels))
 
         # TODO: add importance weights, error computation
 
-        logging.debug("Separating events by PID...")
-        separated_events = OrderedDict()
-        for sig in self.output_channels:
-            this_sig_events = self.events.applyCut(pid_spec[sig])
-            separated_events[sig] = this_sig_events
-
         # Derive transforms by combining flavints that behave similarly, but
         # apply the derived transforms to the input flavints separately
         # (leaving combining these together to later)
+        xform_arrays = pid_transform_arrays(
+            events=self.events,
+            transform_groups=self.transform_groups,
+            binning=self.output_binning,
+            pid_spec=pid_spec,
+            weights_col=self.params.pid_weights_name.value
+        )
         transforms = []
-        for flavint_group in self.transform_groups:
-            logging.debug("Working on %s PID", flavint_group)
-
-            repr_flavint = flavint_group[0]
-
-            # TODO(shivesh): errors
-            # TODO(shivesh): total histo check?
-            sig_histograms = {}
-            total_histo = np.zeros(self.output_binning.shape)
-            for repr_flavint in flavint_group:
-                histo = self.events.histogram(
-                    kinds=repr_flavint,
-                    binning=self.output_binning,
-                    weights_col=self.params.pid_weights_name.value,
-                    errors=None
-                ).hist
-                total_histo += histo
-
-            for sig in self.output_channels:
-                sig_histograms[sig] = np.zeros(self.output_binning.shape)
-                for repr_flavint in flavint_group:
-                    this_sig_histo = separated_events[sig].histogram(
-                        kinds=repr_flavint,
-                        binning=self.output_binning,
-                        weights_col=self.params.pid_weights_name.value,
-                        errors=None
-                    ).hist
-                    sig_histograms[sig] += this_sig_histo
-
+        for flavint_group, group_xform_arrays in zip(self.transform_groups,
+                                                     xform_arrays):
+            # Inputs the transforms of this group apply to (membership is
+            # checked by parsing the names, so only do it once per group)
+            group_input_names = [input_name for input_name in self.input_names
+                                 if input_name in flavint_group]
             for sig in self.output_channels:
-                with np.errstate(divide='ignore', invalid='ignore'):
-                    xform_array = sig_histograms[sig] / total_histo
-
-                num_invalid = np.sum(~np.isfinite(xform_array))
-                if num_invalid > 0:
-                    logging.warn(
-                        'Group "%s", PID signature "%s" has %d bins with no'
-                        ' events (and hence the ability to separate events'
-                        ' by PID cannot be ascertained). These are being'
-                        ' masked off from any further computations.',
-                        flavint_group, sig, num_invalid
-                    )
-                    # TODO: this caused buggy event propagation for some
-                    # reason; check and re-introduced the masked array idea
-                    # when this is fixed. For now, replicating the behavior
-                    # from PISA 2.
-                    #xform_array = np.ma.masked_invalid(xform_array)
-
-                # Double check that no NaN remain
-                #assert not np.any(np.isnan(xform_array))
-
                 # Copy this transform to use for each input in the group
-                for input_name in self.input_names:
-                    if input_name not in flavint_group:
-                        continue
+                for input_name in group_input_names:
                     xform = BinnedTensorTransform(
                         input_names=input_name,
                         output_name=self.suffix_channel(input_name, sig),
                         input_binning=self.input_binning,
                         output_binning=self.output_binning,
-                        xform_array=xform_array
+                        xform_array=group_xform_arrays[sig]
                     )
                     transforms.append(xform)
 
@@ -393,19 +349,17 @@ class hist(Stage):
         # Check type of pid_events
         assert isinstance(params.pid_events.value, (basestring, Events))
 
-        # Check the groupings of the pid_events file
-        events = Events(params.pid_events.value)
-        should_be_joined = sorted([
-            NuFlavIntGroup('nue_cc + nuebar_cc'),
-            NuFlavIntGroup('numu_cc + numubar_cc'),
-            NuFlavIntGroup('nutau_cc + nutaubar_cc'),
-            NuFlavIntGroup('nuall_nc + nuallbar_nc'),
-        ])
+        # Check the groupings of the pid_events file; only its metadata is
+        # needed, so avoid loading the events themselves
+        if isinstance(params.pid_events.value, Events):
+            metadata = params.pid_events.value.metadata
+        else:
+            metadata = Events.read_metadata(params.pid_events.value)
         are_joined = sorted([
             NuFlavIntGroup(s)
-            for s in events.metadata['flavints_joined']
+            for s in metadata.get('flavints_joined', [])
         ])
-        if are_joined != should_be_joined:
+        if are_joined != PID_EVENTS_JOINED_GROUPS:
             raise ValueError('Events passed have %s joined groupings but'
                              ' it is required to have %s joined groupings.'
-                             % (are_joined, should_be_joined))
+                             % (are_joined, PID_EVENTS_JOINED_GROUPS))
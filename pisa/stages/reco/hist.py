@@ -286,8 +286,8 @@ class hist(Stage):
                 weights_col=self.params.reco_weights_name.value,
                 errors=(self.error_method not in [None, False])
             )
-            # Extract just the numpy array to work with
-            true_event_counts = true_event_counts.hist
+            # Extract (a copy of) just the numpy array to work with
+            true_event_counts = true_event_counts.hist.copy()
 
             # If there weren't any events in the input (true_*) bin, make this
             # bin have no effect -- i.e., populate all output bins
@@ -307,7 +307,7 @@ class hist(Stage):
                 norm_factors = np.expand_dims(norm_factors, axis=-1)
 
             # Apply the normalization to the kernels
-            reco_kernel *= norm_factors
+            reco_kernel = reco_kernel * norm_factors
 
             assert np.all(reco_kernel >= 0), \
                     'number of elements less than 0 = %d' \
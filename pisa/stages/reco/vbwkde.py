@@ -1692,10 +1692,13 @@ class vbwkde(Stage): # pylint: disable=invalid-name
                     # At that coordinate, we broadcast the information from
                     # the `reco_coszen` dimension into the entire `reco_energy`
                     # dimension.
-                    kernel.hist[coszen_indexer] *= kernel_binning.broadcast(
-                        reco_coszen_fractions,
-                        from_dim='reco_coszen',
-                        to_dims=['reco_energy']
+                    kernel[coszen_indexer] = (
+                        kernel.hist[coszen_indexer]
+                        * kernel_binning.broadcast(
+                            reco_coszen_fractions,
+                            from_dim='reco_coszen',
+                            to_dims=['reco_energy']
+                        )
                     )
 
         with self._xform_kernels_lock:
@@ -216,8 +216,8 @@ def recursiveEquality(x, y):
     # Numpy types
     elif isinstance(x, NP_TYPES) or isinstance(y, NP_TYPES):
         if np.shape(x) != np.shape(y):
-            logging.trace('shape(x): %s' %np.shape(x))
-            logging.trace('shape(y): %s' %np.shape(y))
+            logging.trace('shape(x): %s' %(np.shape(x),))
+            logging.trace('shape(y): %s' %(np.shape(y),))
             return False
         if not np.allclose(x, y, **ALLCLOSE_KW):
             logging.trace('x: %s' %x)
@@ -724,13 +724,16 @@ def hash2hex(hash, bits=64):
     return hex_hash
 
 
+OUTER_DOLLARS_RE = re.compile(r'^\$(.*)\$$')
+OUTER_BRACE_PARENS_RE = re.compile(r'^\{\((.*)\)\}$')
+OUTER_PARENS_RE = re.compile(r'^\((.*)\)$')
 def strip_outer_dollars(value):
     """Strip surrounding dollars signs from TeX string, ignoring leading and
     trailing whitespace"""
     if value is None:
         return '{}'
     value = value.strip()
-    m = re.match(r'^\$(.*)\$$', value)
+    m = OUTER_DOLLARS_RE.match(value)
     if m is not None:
         value = m.groups()[0]
     return value
@@ -742,10 +745,10 @@ def strip_outer_parens(value):
     if value is None:
         return ''
     value = value.strip()
-    m = re.match(r'^\{\((.*)\)\}$', value)
+    m = OUTER_BRACE_PARENS_RE.match(value)
     if m is not None:
         value = m.groups()[0]
-    m = re.match(r'^\((.*)\)$', value)
+    m = OUTER_PARENS_RE.match(value)
     if m is not None:
         value = m.groups()[0]
     return value
@@ -119,7 +119,8 @@ def from_hdf(val, return_node=None, return_attrs=False):
     return data
 
 
-def to_hdf(data_dict, tgt, attrs=None, overwrite=True, warn=True):
+def to_hdf(data_dict, tgt, attrs=None, overwrite=True, warn=True,
+           contiguous=False):
     """Store a (possibly nested) dictionary to an HDF5 file or branch node
     within an HDF5 file (an h5py Group).
 
@@ -156,6 +157,14 @@ def to_hdf(data_dict, tgt, attrs=None, overwrite=True, warn=True):
         warning by setting to `False` (e.g. when overwriting is the desired
         behaviour).
 
+    contiguous : bool
+        Store datasets contiguously and without the shuffle filter. Since no
+        compression is applied here, this makes reading whole datasets (as
+        `from_hdf` does) several times faster for large arrays, but a file
+        compressed later on by post-processing (e.g. with `h5repack`) then
+        needs the shuffle filter to be applied at that point. Default is
+        `False`, i.e. datasets are chunked and shuffled.
+
     """
     if not isinstance(data_dict, Mapping):
         raise TypeError('`data_dict` only accepts top-level'
@@ -217,8 +226,8 @@ def to_hdf(data_dict, tgt, attrs=None, overwrite=True, warn=True):
                 shuffle = False
                 chunks = None
             else:
-                shuffle = True
-                chunks = True
+                shuffle = not contiguous
+                chunks = None if contiguous else True
                 # Store the node_hash for linking to later if this is more than
                 # a scalar datatype. Assumed that "None" has
                 node_hashes[node_hash] = full_path
@@ -321,6 +330,14 @@ def test_hdf():
         assert data.keys() == loaded_data1.keys()
         assert recursiveEquality(data, loaded_data1)
 
+        fpath = os.path.join(temp_dir, 'to_hdf_contiguous.hdf5')
+        to_hdf(data, fpath, overwrite=True, warn=False, contiguous=True)
+        loaded_data3 = from_hdf(fpath)
+        assert recursiveEquality(data, loaded_data3)
+        with h5py.File(fpath, 'r') as h5file:
+            dset = h5file['top/secondlvl1/thirdlvl11']
+            assert dset.chunks is None and not dset.shuffle
+
         attrs = OrderedDict([
             ('float1', 9.98237),
             ('float2', 1.),
@@ -71,11 +71,14 @@ def myjit(f):
         assert '@myjit' in source[0]
         source = '\n'.join(source[1:]) + '\n'
         source = source.replace('cuda.local.array', 'np.empty')
-        exec(source)
-        fun = eval(f.__name__)
+        # execute in the namespace of the module defining `f`, so that the
+        # function sees that module's globals (like it does on the GPU)
+        module_globals = f.__globals__
+        exec(source, module_globals)
+        fun = module_globals[f.__name__]
         newfun = jit(fun, nopython=True)
         # needs to be exported to globals
-        globals()[f.__name__] = newfun
+        module_globals[f.__name__] = newfun
         return newfun
 
 @myjit
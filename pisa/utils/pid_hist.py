@@ -0,0 +1,386 @@
+"""
+Histogram events in total and separately for PID signatures (e.g. tracks and
+cascades), binning each event only once.
+"""
+
+
+from __future__ import absolute_import, division
+
+from collections import OrderedDict
+import threading
+
+from numba import jit
+import numpy as np
+
+from pisa import OMP_NUM_THREADS
+from pisa.utils.flavInt import NuFlavIntGroup
+from pisa.utils.log import logging, set_verbosity
+
+
+__all__ = ['PID_EVENTS_JOINED_GROUPS', 'pid_transform_arrays',
+           'histogram_by_pid', 'fill_histograms_by_pid',
+           'test_histogram_by_pid']
+
+__license__ = '''Copyright (c) 2014-2017, The IceCube Collaboration
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.'''
+
+
+PID_EVENTS_JOINED_GROUPS = sorted([
+    NuFlavIntGroup('nue_cc + nuebar_cc'),
+    NuFlavIntGroup('numu_cc + numubar_cc'),
+    NuFlavIntGroup('nutau_cc + nutaubar_cc'),
+    NuFlavIntGroup('nuall_nc + nuallbar_nc'),
+])
+"""Flavint groupings that events files used by the PID stages must have
+joined (sorted)"""
+
+
+def pid_transform_arrays(events, transform_groups, binning, pid_spec,
+                         weights_col=None):
+    """Compute, for each group of flavints, the fraction of (weighted) events
+    in each bin that have each PID signature.
+
+    Parameters
+    ----------
+    events : pisa.core.events.Events
+        Events to derive the fractions from; flavints joined in the events
+        (see `Events.flavint_groups`) are binned only once
+
+    transform_groups : sequence of NuFlavIntGroup
+        Events of all flavints in a group are combined to derive its fractions
+
+    binning : MultiDimBinning
+        Binning of the fractions; its dimension names are the events columns
+        to bin
+
+    pid_spec : OrderedDict
+        Criteria selecting the events of each PID signature, keyed by
+        signature, in the same form as accepted by `Events.applyCut`
+
+    weights_col : None or string
+        Events column to use as weights; if None, events are not weighted
+
+    Returns
+    -------
+    xform_arrays : list of OrderedDict
+        One per group in `transform_groups` (in the same order), holding the
+        fractions for each signature in `pid_spec`. The arrays are read-only,
+        so they can be shared between transforms.
+
+    """
+    # Parse the criteria once; each is evaluated directly on the columns of
+    # each flavint to get a mask (so no events are copied)
+    pid_criteria = OrderedDict()
+    for sig, criteria in pid_spec.items():
+        pid_criteria[sig] = compile(criteria, '<pid_spec>', 'eval')
+
+    bin_edges = [edges.magnitude for edges in binning.bin_edges]
+
+    # All flavints joined in the events file (e.g. nue_cc and nuebar_cc)
+    # hold the same events, so bin these only once for all of them
+    events_flavints = {}
+    for events_group in events.flavint_groups:
+        for flavint in events_group:
+            events_flavints[str(flavint)] = events_group[0]
+    binned_events = {}
+
+    xform_arrays = []
+    for flavint_group in transform_groups:
+        logging.debug("Working on %s PID", flavint_group)
+
+        # TODO(shivesh): errors
+        # TODO(shivesh): total histo check?
+        sig_histograms = OrderedDict()
+        for sig in pid_criteria:
+            sig_histograms[sig] = np.zeros(binning.shape)
+        total_histo = np.zeros(binning.shape)
+        for flavint in flavint_group:
+            events_flavint = events_flavints.get(str(flavint), flavint)
+            if str(events_flavint) not in binned_events:
+                # Bin the events once, filling every PID signature (and the
+                # total) in the same pass
+                data = events[events_flavint]
+                sample = [data[name] for name in binning.names]
+                columns = dict(data)
+                masks = OrderedDict()
+                for sig, criteria in pid_criteria.items():
+                    masks[sig] = eval(criteria, {'np': np}, columns)
+                weights = None
+                if weights_col is not None:
+                    weights = data[weights_col]
+                binned_events[str(events_flavint)] = histogram_by_pid(
+                    sample=sample, bin_edges=bin_edges, masks=masks,
+                    weights=weights
+                )
+
+            this_sig_histos, histo = binned_events[str(events_flavint)]
+            total_histo += histo
+            for sig in pid_criteria:
+                sig_histograms[sig] += this_sig_histos[sig]
+
+        group_xform_arrays = OrderedDict()
+        for sig in pid_criteria:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xform_array = sig_histograms[sig] / total_histo
+
+            num_invalid = np.sum(~np.isfinite(xform_array))
+            if num_invalid > 0:
+                logging.warn(
+                    'Group "%s", PID signature "%s" has %d bins with no'
+                    ' events (and hence the ability to separate events'
+                    ' by PID cannot be ascertained). These are being'
+                    ' masked off from any further computations.',
+                    flavint_group, sig, num_invalid
+                )
+                # TODO: this caused buggy event propagation for some
+                # reason; check and re-introduced the masked array idea
+                # when this is fixed. For now, replicating the behavior
+                # from PISA 2.
+                #xform_array = np.ma.masked_invalid(xform_array)
+
+            # Double check that no NaN remain
+            #assert not np.any(np.isnan(xform_array))
+
+            # Transforms for all inputs in the group share this array
+            # (BinnedTensorTransform does not copy a contiguous array), so
+            # protect it from changes made through any one of them
+            xform_array.setflags(write=False)
+            group_xform_arrays[sig] = xform_array
+
+        xform_arrays.append(group_xform_arrays)
+
+    return xform_arrays
+
+
+def histogram_by_pid(sample, bin_edges, masks, weights=None,
+                     threads=OMP_NUM_THREADS):
+    """Histogram events in total and separately for each PID signature, with
+    a single pass over the events (rather than one `np.histogramdd` per
+    signature).
+
+    Parameters
+    ----------
+    sample : sequence of arrays
+        Event values, one array per binning dimension
+
+    bin_edges : sequence of arrays
+        Bin edges, one array per binning dimension. As for `np.histogramdd`,
+        all bins but the last are half-open, and the last includes its upper
+        edge.
+
+    masks : OrderedDict
+        Boolean array per signature selecting the events that belong to it
+
+    weights : None or array
+        Event weights; if None, each event counts once
+
+    threads : int >= 1
+        Number of threads to divide the events among; each fills its own
+        histograms, which are summed up at the end. Defaults to
+        `pisa.OMP_NUM_THREADS`.
+
+    Returns
+    -------
+    sig_histograms : OrderedDict
+        Histogram for each signature in `masks`
+
+    total_histo : array
+        Histogram of all events
+
+    """
+    shape = tuple(len(edges) - 1 for edges in bin_edges)
+    num_bins = int(np.prod(shape))
+    num_events = len(sample[0])
+
+    # Pad the edges into one array, as the kernel cannot take a ragged list
+    num_edges = np.array([len(edges) for edges in bin_edges], dtype=np.int64)
+    padded_edges = np.full((len(bin_edges), num_edges.max()), np.inf)
+    for dim, edges in enumerate(bin_edges):
+        padded_edges[dim, :len(edges)] = edges
+
+    # Single precision event values and weights are passed on as they are
+    # rather than as double precision copies (the kernel still accumulates
+    # in double precision); anything else, e.g. float16, is converted
+    sample = np.array(sample).reshape(len(bin_edges), num_events)
+    if sample.dtype not in (np.float32, np.float64):
+        sample = sample.astype(np.float64)
+    masks_array = np.array(masks.values(), dtype=np.bool_)
+    masks_array = masks_array.reshape(len(masks), num_events)
+    if weights is None:
+        weights = np.ones(num_events, dtype=np.float32)
+    weights = np.asarray(weights)
+    if weights.dtype not in (np.float32, np.float64):
+        weights = weights.astype(np.float64)
+
+    # last row holds the total
+    histos = np.zeros((threads, len(masks) + 1, num_bins), dtype=np.float64)
+    if threads == 1:
+        fill_histograms_by_pid(sample, padded_edges, num_edges, masks_array,
+                               weights, histos[0], 0, num_events)
+    else:
+        chunklen = num_events // threads
+        workers = []
+        errors = []
+        start = 0
+        for i in range(threads):
+            stop = num_events if i == (threads - 1) else start + chunklen
+            worker = threading.Thread(
+                target=_fill_histograms_worker,
+                args=(errors, sample, padded_edges, num_edges, masks_array,
+                      weights, histos[i], start, stop)
+            )
+            worker.start()
+            workers.append(worker)
+            start += chunklen
+        for worker in workers:
+            worker.join()
+        # A failed chunk would otherwise leave its histograms silently empty
+        if errors:
+            raise errors[0]
+    histos = histos.sum(axis=0)
+
+    sig_histograms = OrderedDict()
+    for sig_idx, sig in enumerate(masks.keys()):
+        sig_histograms[sig] = histos[sig_idx].reshape(shape)
+    total_histo = histos[-1].reshape(shape)
+
+    return sig_histograms, total_histo
+
+
+def _fill_histograms_worker(errors, *args):
+    """Run `fill_histograms_by_pid` in a worker thread, appending any
+    exception raised to `errors` for the calling thread to re-raise"""
+    try:
+        fill_histograms_by_pid(*args)
+    except Exception as err: # pylint: disable=broad-except
+        errors.append(err)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def fill_histograms_by_pid(sample, bin_edges, num_edges, masks, weights,
+                           histos, start, stop):
+    """Add the weight of each event in [`start`, `stop`) to its bin in the
+    histogram of every signature it belongs to and in the total (the last row
+    of `histos`).
+
+    Bins follow the `np.histogramdd` convention; events outside the binning
+    (or with NaN values) are skipped.
+
+    """
+    num_dims = sample.shape[0]
+    num_sigs = masks.shape[0]
+    for event in range(start, stop):
+        flat_idx = 0
+        for dim in range(num_dims):
+            x = sample[dim, event]
+            last = num_edges[dim] - 1
+            if not (x >= bin_edges[dim, 0] and x <= bin_edges[dim, last]):
+                flat_idx = -1
+                break
+            # bisect for the last edge <= x; x on the upper edge of the
+            # binning goes into the last bin
+            lo = 0
+            hi = last
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if bin_edges[dim, mid] <= x:
+                    lo = mid
+                else:
+                    hi = mid
+            flat_idx = flat_idx * last + lo
+        if flat_idx < 0:
+            continue
+        weight = weights[event]
+        for sig_idx in range(num_sigs):
+            # select instead of branch, as the signatures of consecutive
+            # events are unpredictable; adding 0 leaves the bin unchanged
+            histos[sig_idx, flat_idx] += (
+                weight if masks[sig_idx, event] else 0.
+            )
+        histos[num_sigs, flat_idx] += weight
+
+
+def test_histogram_by_pid():
+    """Unit tests for `histogram_by_pid`"""
+    rand = np.random.RandomState(0)
+    bin_edges = [np.array([0, 1, 1.5, 2, 3.]), np.array([-1, 0, 1.])]
+    # include events outside the binning, on the edges, and NaN
+    sample = [
+        np.concatenate([rand.uniform(-0.5, 3.5, 1000), bin_edges[0],
+                        [np.nan]]),
+        np.concatenate([rand.uniform(-1.2, 1.2, 1000), [1, -1, 0, 1, 2, 0.]]),
+    ]
+    num_events = len(sample[0])
+    pid = rand.uniform(size=num_events)
+    # signatures need not partition the events
+    masks = OrderedDict([('cscd', pid <= 0.55), ('trck', pid > 0.3)])
+
+    for weights in [None, rand.uniform(size=num_events),
+                    rand.uniform(size=num_events).astype(np.float32)]:
+        sig_histograms, total_histo = histogram_by_pid(
+            sample=sample, bin_edges=bin_edges, masks=masks, weights=weights
+        )
+        ref, _ = np.histogramdd(sample, bins=bin_edges, weights=weights)
+        assert np.array_equal(total_histo, ref)
+        for sig, mask in masks.items():
+            ref, _ = np.histogramdd(
+                [values[mask] for values in sample], bins=bin_edges,
+                weights=None if weights is None else weights[mask]
+            )
+            assert np.array_equal(sig_histograms[sig], ref), sig
+
+    # events divided among threads
+    sig_histograms, total_histo = histogram_by_pid(
+        sample=sample, bin_edges=bin_edges, masks=masks, weights=weights,
+        threads=3
+    )
+    ref, _ = np.histogramdd(sample, bins=bin_edges, weights=weights)
+    assert np.allclose(total_histo, ref, rtol=1e-6, atol=0)
+    for sig, mask in masks.items():
+        ref, _ = np.histogramdd(
+            [values[mask] for values in sample], bins=bin_edges,
+            weights=weights[mask]
+        )
+        assert np.allclose(sig_histograms[sig], ref, rtol=1e-6, atol=0), sig
+
+    # an exception in a worker thread is raised in the calling thread (rather
+    # than leaving that thread's histograms empty)
+    def failing_fill(*args): # pylint: disable=unused-argument
+        raise ValueError('worker failure')
+    orig_fill = globals()['fill_histograms_by_pid']
+    globals()['fill_histograms_by_pid'] = failing_fill
+    try:
+        histogram_by_pid(sample=sample, bin_edges=bin_edges, masks=masks,
+                         threads=3)
+    except ValueError:
+        pass
+    else:
+        assert False, 'exception in worker thread was not raised'
+    finally:
+        globals()['fill_histograms_by_pid'] = orig_fill
+
+    # no events at all
+    sig_histograms, total_histo = histogram_by_pid(
+        sample=[np.zeros(0), np.zeros(0)], bin_edges=bin_edges,
+        masks=OrderedDict([('cscd', np.zeros(0, dtype=bool))])
+    )
+    assert total_histo.shape == (4, 2) and np.all(total_histo == 0)
+    assert np.all(sig_histograms['cscd'] == 0)
+
+    logging.info('<< PASS : test_histogram_by_pid >>')
+
+
+if __name__ == '__main__':
+    set_verbosity(1)
+    test_histogram_by_pid()
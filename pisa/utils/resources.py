@@ -6,7 +6,7 @@ in the filesystem or with the installed PISA package.
 
 from __future__ import absolute_import
 
-from os import environ
+from os import environ, getcwd
 from os.path import exists, expanduser, expandvars, join
 import sys
 
@@ -34,6 +34,39 @@ __license__ = '''Copyright (c) 2014-2017, The IceCube Collaboration
 
 RESOURCES_SUBDIRS = ['data', 'scripts', 'settings']
 
+# Locations of resources and paths found so far, so repeated lookups only have
+# to check that the location still exists; see `_lookup_key` for the keys
+_FOUND_PATHS = {}
+
+
+# Expanded paths of PISA_RESOURCES, along with the value they were split from
+_RESOURCES_ROOTS = (None, ())
+
+# Resources directory of the installed `pisa_examples` package in the
+# filesystem (False if it is not in the filesystem), see
+# `_find_package_resource`
+_PACKAGE_RESOURCES_DIR = None
+
+
+def _lookup_key(kind, spec):
+    """Key for `_FOUND_PATHS`, including what else determines the location a
+    lookup of `spec` results in"""
+    return kind, spec, environ.get('PISA_RESOURCES'), getcwd()
+
+
+def _resources_roots():
+    """Expanded paths in the PISA_RESOURCES environment variable; these are
+    only split out again if the variable has changed since the last call"""
+    global _RESOURCES_ROOTS # pylint: disable=global-statement
+    pisa_resources = environ.get('PISA_RESOURCES')
+    if pisa_resources != _RESOURCES_ROOTS[0]:
+        roots = ()
+        if pisa_resources is not None:
+            roots = tuple(expandvars(expanduser(root))
+                          for root in pisa_resources.split(':') if root)
+        _RESOURCES_ROOTS = (pisa_resources, roots)
+    return _RESOURCES_ROOTS[1]
+
 
 def find_resource(resource, fail=True):
     """Try to find a resource (file or directory).
@@ -52,6 +85,10 @@ def find_resource(resource, fail=True):
     extracted) to a temporary cache directory. Therefore, it is preferable to
     use the `open_resource` method directly, and avoid this method if possible.
 
+    Locations found are remembered, so looking up the same resource again
+    (with the same PISA_RESOURCES and working directory) only checks that it
+    still exists there.
+
 
     Parameters
     ----------
@@ -86,6 +123,33 @@ def find_resource(resource, fail=True):
 
     log.logging.trace('Attempting to find resource "%s"', resource)
 
+    lookup_key = _lookup_key('resource', expandvars(expanduser(resource)))
+    resource_path = _FOUND_PATHS.get(lookup_key)
+    if resource_path is not None and exists(resource_path):
+        log.logging.trace('Found resource "%s" at "%s" in previous lookup',
+                          resource, resource_path)
+        return resource_path
+
+    resource_path = _find_resource(resource)
+    if resource_path is not None:
+        _FOUND_PATHS[lookup_key] = resource_path
+        return resource_path
+
+    # If you get here, the resource is nowhere to be found
+    msg = ('Could not find resource "%s" in filesystem OR in PISA package.'
+           % resource)
+    if fail:
+        raise IOError(msg)
+    log.logging.debug(msg)
+
+
+def _find_resource(resource):
+    """Search for `resource` as described in `find_resource`, returning None
+    if it is not found"""
+    # NOTE: this import needs to be here -- and not at top -- to avoid circular
+    # imports
+    import pisa.utils.log as log
+
     # 1) Check for file in filesystem at absolute path or relative to
     #    PISA_RESOURCES environment var
     resource_path = find_path(resource, fail=False)
@@ -97,32 +161,46 @@ def find_resource(resource, fail=True):
 
     # 2) Look inside the installed pisa package
     log.logging.trace('Searching package resources...')
-    resource_spec = ('pisa_examples', 'resources/' + resource)
-    if pkg_resources.resource_exists(*resource_spec):
-        resource_path = pkg_resources.resource_filename(*resource_spec)
-        log.logging.debug('Found resource "%s" in PISA package at "%s"',
-                          resource, resource_path)
-        return resource_path
+    for augmented_path in [resource] + ['/'.join([subdir, resource])
+                                        for subdir in RESOURCES_SUBDIRS]:
+        resource_path = _find_package_resource(augmented_path)
+        if resource_path is not None:
+            log.logging.debug('Found resource "%s" in PISA package at "%s"',
+                              resource, resource_path)
+            return resource_path
 
-    for subdir in RESOURCES_SUBDIRS + [None]:
-        if subdir is None:
-            augmented_path = resource
+    return None
+
+
+def _find_package_resource(path):
+    """Location of `path` within the `pisa_examples/resources` package
+    directory, or None if it does not exist there.
+
+    If the package is installed in the filesystem (i.e., not as a zipped egg),
+    its resources directory is looked up with `pkg_resources` only once, and
+    from then on `path` is checked for directly.
+
+    """
+    global _PACKAGE_RESOURCES_DIR # pylint: disable=global-statement
+    if _PACKAGE_RESOURCES_DIR is None:
+        provider = pkg_resources.get_provider('pisa_examples')
+        if isinstance(provider, pkg_resources.DefaultProvider):
+            _PACKAGE_RESOURCES_DIR = pkg_resources.resource_filename(
+                'pisa_examples', 'resources'
+            )
         else:
-            augmented_path = '/'.join([subdir, resource])
+            _PACKAGE_RESOURCES_DIR = False
 
-        resource_spec = ('pisa_examples', 'resources/' + augmented_path)
-        if pkg_resources.resource_exists(*resource_spec):
-            resource_path = pkg_resources.resource_filename(*resource_spec)
-            log.logging.debug('Found resource "%s" in PISA package at "%s"',
-                              resource, resource_path)
+    if _PACKAGE_RESOURCES_DIR:
+        resource_path = join(_PACKAGE_RESOURCES_DIR, *path.split('/'))
+        if exists(resource_path):
             return resource_path
+        return None
 
-    # 3) If you get here, the resource is nowhere to be found
-    msg = ('Could not find resource "%s" in filesystem OR in PISA package.'
-           % resource)
-    if fail:
-        raise IOError(msg)
-    log.logging.debug(msg)
+    resource_spec = ('pisa_examples', 'resources/' + path)
+    if pkg_resources.resource_exists(*resource_spec):
+        return pkg_resources.resource_filename(*resource_spec)
+    return None
 
 
 def open_resource(resource, mode='r'):
@@ -241,6 +319,33 @@ def find_path(pathspec, fail=True):
     # imports
     import pisa.utils.log as log
 
+    lookup_key = _lookup_key('path', expandvars(expanduser(pathspec)))
+    resource_path = _FOUND_PATHS.get(lookup_key)
+    if resource_path is not None and exists(resource_path):
+        log.logging.trace('Found path "%s" at "%s" in previous lookup',
+                          pathspec, resource_path)
+        return resource_path
+
+    resource_path = _find_path(pathspec)
+    if resource_path is not None:
+        _FOUND_PATHS[lookup_key] = resource_path
+        return resource_path
+
+    # If you get here, the file is nowhere to be found
+    msg = 'Could not find path "%s"' % pathspec
+    if fail:
+        raise IOError(msg)
+    log.logging.trace(msg)
+    return None
+
+
+def _find_path(pathspec):
+    """Search for `pathspec` as described in `find_path`, returning None if
+    it is not found"""
+    # NOTE: this import needs to be here -- and not at top -- to avoid circular
+    # imports
+    import pisa.utils.log as log
+
     # 1) Check for absolute path or path relative to current working
     #    directory
     log.logging.trace('Checking absolute or path relative to cwd...')
@@ -253,14 +358,9 @@ def find_path(pathspec, fail=True):
     #    to that
     log.logging.trace('Checking environment for $PISA_RESOURCES...')
     if 'PISA_RESOURCES' in environ:
-        pisa_resources = environ['PISA_RESOURCES']
         log.logging.trace('Searching resource path PISA_RESOURCES=%s',
-                          pisa_resources)
-        resource_paths = pisa_resources.split(':')
-        for resource_path in resource_paths:
-            if not resource_path:
-                continue
-            resource_path = expandvars(expanduser(resource_path))
+                          environ['PISA_RESOURCES'])
+        for resource_path in _resources_roots():
             # Look in all default sub-dirs for the pathspec
             augmented_paths = [join(resource_path, subdir, pathspec)
                                for subdir in RESOURCES_SUBDIRS]
@@ -273,9 +373,4 @@ def find_path(pathspec, fail=True):
                                       pathspec, augmented_path)
                     return augmented_path
 
-    # 3) If you get here, the file is nowhere to be found
-    msg = 'Could not find path "%s"' % pathspec
-    if fail:
-        raise IOError(msg)
-    log.logging.trace(msg)
     return None
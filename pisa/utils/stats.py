@@ -9,7 +9,7 @@ import numpy as np
 from scipy.special import gammaln
 from uncertainties import unumpy as unp
 
-from pisa import FTYPE
+from pisa import FTYPE, NUMBA_AVAIL, numba_jit
 from pisa.utils.barlow import Likelihoods
 from pisa.utils.comparisons import FTYPE_PREC, isbarenumeric
 from pisa.utils.log import logging
@@ -17,7 +17,7 @@ from pisa.utils.log import logging
 
 __all__ = ['SMALL_POS', 'CHI2_METRICS', 'LLH_METRICS', 'ALL_METRICS',
            'maperror_logmsg',
-           'chi2', 'llh', 'log_poisson', 'log_smear', 'conv_poisson',
+           'chi2', 'chi2_total', 'llh', 'llh_total', 'log_poisson', 'log_smear', 'conv_poisson',
            'norm_conv_poisson', 'conv_llh', 'barlow_llh', 'mod_chi2']
 
 __author__ = 'P. Eller, T. Ehrhardt, J.L. Lanfranchi'
@@ -213,6 +213,148 @@ def llh(actual_values, expected_values):
     return llh_val
 
 
+def _nominal_float_arrays(actual_values, expected_values):
+    """Strip any uncertainties and return flattened, contiguous floating-point
+    arrays of the nominal values (single precision arrays are passed through
+    as such; anything else is converted to float64), raising ValueError on
+    shape mismatch.
+    Negative values are caught by the kernels below (see `_check_negative`)
+    and non-finite values are left in place (they are skipped in the sums, as
+    they are masked in `chi2` and `llh`)."""
+    if actual_values.shape != expected_values.shape:
+        raise ValueError(
+            'Shape mismatch: actual_values.shape = %s,'
+            ' expected_values.shape = %s'
+            % (actual_values.shape, expected_values.shape)
+        )
+    if not isbarenumeric(actual_values):
+        actual_values = unp.nominal_values(actual_values)
+    if not isbarenumeric(expected_values):
+        expected_values = unp.nominal_values(expected_values)
+    if actual_values.dtype != np.float32:
+        actual_values = np.ascontiguousarray(actual_values, dtype=np.float64)
+    else:
+        actual_values = np.ascontiguousarray(actual_values)
+    if expected_values.dtype != np.float32:
+        expected_values = np.ascontiguousarray(expected_values,
+                                               dtype=np.float64)
+    else:
+        expected_values = np.ascontiguousarray(expected_values)
+    return actual_values.ravel(), expected_values.ravel()
+
+
+def _check_negative(actual_values, expected_values):
+    """Raise ValueError describing whichever of the inputs has values < 0"""
+    with np.errstate(invalid='ignore'):
+        if np.any(actual_values < 0):
+            msg = ('`actual_values` must all be >= 0...\n'
+                   + maperror_logmsg(actual_values))
+            raise ValueError(msg)
+        if np.any(expected_values < 0):
+            msg = ('`expected_values` must all be >= 0...\n'
+                   + maperror_logmsg(expected_values))
+            raise ValueError(msg)
+
+
+@numba_jit(nopython=True, nogil=True, cache=True)
+def _chi2_total_kernel(actual_values, expected_values):
+    """Sum of chi-squared values over finite pairs of elements, clipping each
+    to [SMALL_POS, inf] and returning 0 if all differences are negligible.
+    The second return value is False (and the sum meaningless) if any value
+    is negative."""
+    total = 0.0
+    max_abs_delta = 0.0
+    for i in range(actual_values.shape[0]):
+        # Inputs may be single precision; always compute in double precision
+        actual = np.float64(actual_values[i])
+        expected = np.float64(expected_values[i])
+        if actual < 0 or expected < 0:
+            return 0.0, False
+        if not (np.isfinite(actual) and np.isfinite(expected)):
+            continue
+        if actual < SMALL_POS:
+            actual = SMALL_POS
+        if expected < SMALL_POS:
+            expected = SMALL_POS
+        delta = actual - expected
+        if abs(delta) > max_abs_delta:
+            max_abs_delta = abs(delta)
+        total += delta*delta / expected
+    if max_abs_delta < 5*FTYPE_PREC:
+        return 0.0, True
+    return total, True
+
+
+@numba_jit(nopython=True, nogil=True, cache=True)
+def _llh_total_kernel(actual_values, expected_values):
+    """Sum of centered Poisson log-likelihoods over finite pairs of elements
+    with non-zero `actual_values`, clipping `expected_values` to
+    [SMALL_POS, inf]. The second return value is False (and the sum
+    meaningless) if any value is negative."""
+    total = 0.0
+    for i in range(actual_values.shape[0]):
+        actual = np.float64(actual_values[i])
+        expected = np.float64(expected_values[i])
+        if actual < 0 or expected < 0:
+            return 0.0, False
+        # Zero counts are masked in `llh` by the log of `actual_values`
+        if not (np.isfinite(actual) and np.isfinite(expected)) or actual <= 0:
+            continue
+        if expected < SMALL_POS:
+            expected = SMALL_POS
+        total += (actual*np.log(expected) - expected
+                  - (actual*np.log(actual) - actual))
+    return total, True
+
+
+def chi2_total(actual_values, expected_values):
+    """Compute the total chi-square between `actual_values` and
+    `expected_values`, i.e. the sum of the values returned by `chi2`, without
+    creating intermediate (masked) arrays.
+
+    Parameters
+    ----------
+    actual_values, expected_values : numpy.ndarrays of same shape
+
+    Returns
+    -------
+    chi2 : float
+
+    """
+    if not NUMBA_AVAIL:
+        return np.sum(chi2(actual_values, expected_values))
+    actual_values, expected_values = _nominal_float_arrays(actual_values,
+                                                           expected_values)
+    total, valid = _chi2_total_kernel(actual_values, expected_values)
+    if not valid:
+        _check_negative(actual_values, expected_values)
+    return total
+
+
+def llh_total(actual_values, expected_values):
+    """Compute the total log-likelihood that `actual_values` came from
+    `expected_values`, i.e. the sum of the values returned by `llh`, without
+    creating intermediate (masked) arrays.
+
+    Parameters
+    ----------
+    actual_values, expected_values : numpy.ndarrays of same shape
+
+    Returns
+    -------
+    llh : float
+
+    """
+    if not NUMBA_AVAIL:
+        return np.sum(llh(actual_values, expected_values))
+    actual_values, expected_values = _nominal_float_arrays(actual_values,
+                                                           expected_values)
+    total, valid = _llh_total_kernel(actual_values, expected_values)
+    if not valid:
+        _check_negative(actual_values, expected_values)
+    return total
+
+
 def log_poisson(k, l):
     r"""Calculate the log of a poisson pdf
 
@@ -401,9 +543,9 @@ def mod_chi2(actual_values, expected_values):
         the inputs
 
     """
-    # Replace 0's with small positive numbers to avoid inf in log
-    np.clip(expected_values, a_min=SMALL_POS, a_max=np.inf,
-            out=expected_values)
+    # Replace 0's with small positive numbers to avoid inf in log (not in
+    # place, as `expected_values` may be a Map's read-only histogram)
+    expected_values = np.clip(expected_values, a_min=SMALL_POS, a_max=np.inf)
     actual_values = unp.nominal_values(actual_values).ravel()
     sigma = unp.std_devs(expected_values).ravel()
     expected_values = unp.nominal_values(expected_values).ravel()